@@ -0,0 +1,120 @@
+"""Local stand-in for the OpenAI chat-completions API.
+
+Replies to the first (tool-enabled) completion of each question with the tool
+calls scripted for it in the workload file, and to the follow-up completion
+with a canned answer, after a configurable delay. Streaming is supported.
+
+    python fake_openai.py --port 9100 --latency-ms 300 --jitter-ms 100
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="Fake OpenAI")
+
+config = {"latency_ms": 0.0, "jitter_ms": 0.0, "script": {}}
+stats = {"completions": 0, "tool_call_turns": 0, "streams": 0, "prompt_bytes": 0}
+
+def load_script(path: str) -> dict:
+    with open(path) as f:
+        return {item["question"]: item.get("tool_calls", []) for item in json.load(f)}
+
+def usage(body: dict, text: str) -> dict:
+    # Rough token estimate (4 characters per token) so usage counters move realistically
+    prompt_tokens = len(json.dumps(body["messages"])) // 4
+    completion_tokens = max(1, len(text) // 4)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens
+    }
+
+def envelope(body: dict, object_type: str, choices: list, **extra) -> dict:
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": object_type,
+        "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": choices,
+        **extra
+    }
+
+def final_answer(messages: list) -> str:
+    tool_bytes = sum(len(m.get("content") or "") for m in messages if m.get("role") == "tool")
+    question = next(m["content"] for m in messages if m.get("role") == "user")
+    return f"Here is what I found about '{question}' in {tool_bytes} bytes of tool results."
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    messages = body["messages"]
+    stats["completions"] += 1
+    stats["prompt_bytes"] += len(json.dumps(messages))
+    
+    delay = config["latency_ms"] + random.uniform(-1, 1) * config["jitter_ms"]
+    await asyncio.sleep(max(0.0, delay) / 1000)
+    
+    last = messages[-1]
+    tool_calls = config["script"].get(last.get("content")) if last.get("role") == "user" else None
+    if tool_calls and body.get("tools"):
+        stats["tool_call_turns"] += 1
+        message = {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [{
+                "id": f"call_{i}",
+                "type": "function",
+                "function": {"name": call["name"], "arguments": json.dumps(call["arguments"])}
+            } for i, call in enumerate(tool_calls)]
+        }
+        return JSONResponse(envelope(body, "chat.completion", [
+            {"index": 0, "message": message, "finish_reason": "tool_calls"}
+        ], usage=usage(body, json.dumps(message["tool_calls"]))))
+    
+    text = final_answer(messages)
+    if not body.get("stream"):
+        return JSONResponse(envelope(body, "chat.completion", [
+            {"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}
+        ], usage=usage(body, text)))
+    
+    stats["streams"] += 1
+    
+    async def chunks():
+        for word in text.split(" "):
+            chunk = envelope(body, "chat.completion.chunk", [
+                {"index": 0, "delta": {"content": word + " "}, "finish_reason": None}
+            ])
+            yield f"data: {json.dumps(chunk)}\n\n"
+        yield "data: [DONE]\n\n"
+    
+    return StreamingResponse(chunks(), media_type="text/event-stream")
+
+@app.get("/stats")
+async def get_stats():
+    return stats
+
+@app.get("/health")
+async def health():
+    return {"status": "healthy"}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="delay before every completion")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="uniform +/- jitter on the delay")
+    parser.add_argument("--workload", default="workload.json", help="questions and their scripted tool calls")
+    args = parser.parse_args()
+    
+    config.update(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, script=load_script(args.workload))
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""Offline end-to-end benchmark for POST /ask.
+
+For every dataset size this seeds a fresh database, starts the fake OpenAI
+server and the API server, drives concurrent /ask load from the weighted
+workload and records latency percentiles, throughput, errors and the
+per-stage breakdown the server reports in its Server-Timing header.
+
+    python run.py --sizes 1,10,100 --requests 300 --concurrency 32 --output results.json
+    python run.py --baseline results-main.json --output results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SERVER_DIR = os.path.join(os.path.dirname(HERE), "server")
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def summarize(values: list) -> dict:
+    return {
+        "mean": round(statistics.fmean(values), 2) if values else 0.0,
+        "p50": round(percentile(values, 50), 2),
+        "p95": round(percentile(values, 95), 2),
+        "p99": round(percentile(values, 99), 2),
+    }
+
+def parse_server_timing(header: str) -> dict:
+    """'llm;dur=12.5, db;dur=1.2' -> {'llm': 12.5, 'db': 1.2}"""
+    stages = {}
+    for part in filter(None, (p.strip() for p in header.split(","))):
+        name, *params = [p.strip() for p in part.split(";")]
+        for param in params:
+            if param.startswith("dur="):
+                stages[name] = float(param[4:])
+    return stages
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+async def wait_until_up(url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+def start(args: list, cwd: str, env: dict) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, *args], cwd=cwd, env=env)
+
+def stop(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+async def drive(url: str, questions: list, weights: list, requests: int, concurrency: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    picks = rng.choices(questions, weights=weights, k=requests)
+    latencies, errors, statuses = [], 0, {}
+    stages = {}
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    
+    async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+        async def one(question: str):
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.post(url, json={"question": question})
+                except httpx.HTTPError:
+                    errors += 1
+                    return
+                latencies.append((time.perf_counter() - started) * 1000)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                if response.status_code != 200:
+                    errors += 1
+                for name, duration in parse_server_timing(response.headers.get("server-timing", "")).items():
+                    stages.setdefault(name, []).append(duration)
+        
+        started = time.perf_counter()
+        await asyncio.gather(*(one(q) for q in picks))
+        elapsed = time.perf_counter() - started
+    
+    return {
+        "requests": requests,
+        "errors": errors,
+        "status_codes": {str(code): count for code, count in sorted(statuses.items())},
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": summarize(latencies),
+        "stages_ms": {name: summarize(values) for name, values in sorted(stages.items())},
+    }
+
+async def bench_size(scale: float, args, workload: list, workdir: str) -> dict:
+    database_url = args.database_url or f"sqlite:///{os.path.join(workdir, f'bench-{scale}.db')}"
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{args.fake_port}/v1",
+        "TIMING_HEADERS": "true",
+    }
+    if not args.cache:
+        env["ANSWER_CACHE_MAX_ENTRIES"] = "0"
+    if not args.router:
+        env["ROUTER_ENABLED"] = "false"
+    
+    seeded = subprocess.run(
+        [sys.executable, "seed.py", "--scale", str(scale), "--seed", str(args.seed), "--days", str(args.days)],
+        cwd=SERVER_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout.strip().splitlines()[-1]
+    
+    fake = start([
+        "fake_openai.py", "--port", str(args.fake_port), "--latency-ms", str(args.latency_ms),
+        "--jitter-ms", str(args.jitter_ms), "--workload", args.workload
+    ], HERE, env)
+    # Through main.py rather than the uvicorn CLI, so several workers get
+    # the shared snapshot and metrics directory prepared for them
+    server = start(["main.py"], SERVER_DIR, {
+        **env, "HOST": "127.0.0.1", "PORT": str(args.port), "LOG_LEVEL": "warning",
+        "WEB_CONCURRENCY": str(args.workers),
+    })
+    try:
+        await wait_until_up(f"http://127.0.0.1:{args.fake_port}/health")
+        await wait_until_up(f"http://127.0.0.1:{args.port}/ready")
+        
+        url = f"http://127.0.0.1:{args.port}/ask"
+        questions = [item["question"] for item in workload]
+        weights = [item.get("weight", 1) for item in workload]
+        if args.warmup:
+            await drive(url, questions, weights, args.warmup, args.concurrency, args.seed + 1)
+        result = await drive(url, questions, weights, args.requests, args.concurrency, args.seed)
+        
+        async with httpx.AsyncClient() as client:
+            result["fake_openai"] = (await client.get(f"http://127.0.0.1:{args.fake_port}/stats")).json()
+    finally:
+        stop(server)
+        stop(fake)
+    
+    return {"scale": scale, "seeded": seeded, **result}
+
+def compare(baseline: dict, current: dict):
+    """Print p50/p95/throughput deltas per dataset size against an earlier results file"""
+    previous = {r["scale"]: r for r in baseline["results"]}
+    print(f"\nvs {baseline.get('commit', '?')}:")
+    for result in current["results"]:
+        old = previous.get(result["scale"])
+        if not old:
+            continue
+        for label, new_value, old_value in (
+            ("p50", result["latency_ms"]["p50"], old["latency_ms"]["p50"]),
+            ("p95", result["latency_ms"]["p95"], old["latency_ms"]["p95"]),
+            ("rps", result["throughput_rps"], old["throughput_rps"]),
+        ):
+            change = (new_value - old_value) / old_value * 100 if old_value else 0.0
+            print(f"  scale {result['scale']:>6} {label}: {old_value:>9.2f} -> {new_value:>9.2f} ({change:+.1f}%)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline /ask benchmark")
+    parser.add_argument("--sizes", default="1,10", help="comma-separated seed.py scale factors")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="fake completion latency")
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--days", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workload", default=os.path.join(HERE, "workload.json"))
+    parser.add_argument("--database-url", help="benchmark against this database instead of a temporary SQLite file")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--fake-port", type=int, default=9100)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--cache", action="store_true", help="keep the answer cache enabled")
+    parser.add_argument("--router", action="store_true", help="keep the template fast path enabled")
+    parser.add_argument("--output", default="results.json")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    args = parser.parse_args()
+    
+    with open(args.workload) as f:
+        workload = json.load(f)
+    
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for scale in (float(s) for s in args.sizes.split(",")):
+            result = asyncio.run(bench_size(scale, args, workload, workdir))
+            report["results"].append(result)
+            latency = result["latency_ms"]
+            print(f"scale {scale:>6}: p50 {latency['p50']:.1f}ms p95 {latency['p95']:.1f}ms "
+                  f"p99 {latency['p99']:.1f}ms {result['throughput_rps']:.1f} req/s errors {result['errors']}")
+    
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(json.load(f), report)
+
+if __name__ == "__main__":
+    main()
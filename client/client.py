@@ -1,33 +1,55 @@
-import requests
+"""Terminal client for the event assistant.
+
+Interactive by default. With --replay or --mix it instead fires questions at
+the server at a set concurrency and rate and prints latency percentiles and
+error rates:
+
+    python client.py --replay questions.txt --concurrency 8
+    python client.py --mix mix.json --requests 500 --concurrency 16 --rate 20
+"""
+import argparse
+import json
+import os
+import random
+import threading
 import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
-SERVER_URL = "http://app-server:8000/ask"
+import requests
+
+SERVER_URL = os.getenv("SERVER_URL", "http://app-server:8000/ask")
+BASE_URL = SERVER_URL.rsplit("/ask", 1)[0]
 MAX_RETRIES = 10
 RETRY_DELAY = 2
+REQUEST_TIMEOUT = 120
+
+# One keep-alive connection pool for the interactive client
+session = requests.Session()
 
 def wait_for_server():
+    """Wait until the server reports ready (falls back to /health on servers without /ready)"""
     for attempt in range(MAX_RETRIES):
         try:
-            response = requests.post(SERVER_URL, json={"question": "ping"})
+            response = session.get(f"{BASE_URL}/ready", timeout=5)
+            if response.status_code == 404:
+                response = session.get(f"{BASE_URL}/health", timeout=5)
             if response.status_code == 200:
                 return True
-        except requests.exceptions.ConnectionError:
+        except requests.exceptions.RequestException:
             pass
         time.sleep(RETRY_DELAY)
     print("Failed to connect to server.")
     return False
 
-def main():
-    if not wait_for_server():
-        return
-
+def interactive():
     print("Ask the event assistant (type 'exit' to quit):")
     while True:
         try:
             q = input("> ").strip()
             if q.lower() == "exit":
                 break
-            response = requests.post(SERVER_URL, json={"question": q})
+            response = session.post(SERVER_URL, json={"question": q}, timeout=REQUEST_TIMEOUT)
             if response.status_code == 200:
                 print("Assistant:", response.json().get("answer"))
             else:
@@ -37,5 +59,117 @@ def main():
         except Exception as e:
             print("Error:", e)
 
+def read_replay(path: str) -> list:
+    """Questions from a text file, one per line; blank lines and # comments are skipped"""
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+def read_mix(path: str) -> tuple:
+    """Questions and weights from a JSON list of {"question", "weight"} objects"""
+    with open(path) as f:
+        entries = json.load(f)
+    return [e["question"] for e in entries], [e.get("weight", 1) for e in entries]
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def replay(questions: list, concurrency: int, rate: float) -> dict:
+    """Send every question, at most `concurrency` at once and `rate` per second overall"""
+    local = threading.local()
+    started = time.perf_counter()
+
+    def ask(i: int, question: str):
+        # Request i is due at i / rate, but it only starts once one of the
+        # `concurrency` threads is free: when the server falls behind, the
+        # pacing turns closed-loop and the start lag below shows by how much
+        due = started + i / rate if rate > 0 else time.perf_counter()
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        sent = time.perf_counter()
+        try:
+            response = local.session.post(SERVER_URL, json={"question": question}, timeout=REQUEST_TIMEOUT)
+            outcome = response.status_code
+        except requests.exceptions.RequestException as e:
+            outcome = type(e).__name__
+        return (time.perf_counter() - sent) * 1000, outcome, max(0.0, sent - due) * 1000
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(ask, range(len(questions)), questions))
+    elapsed = time.perf_counter() - started
+
+    latencies = [ms for ms, outcome, _ in results if outcome == 200]
+    errors = Counter(str(outcome) for _, outcome, _ in results if outcome != 200)
+    return {
+        "requests": len(results),
+        "seconds": round(elapsed, 2),
+        "throughput": round(len(results) / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(sum(errors.values()) / len(results), 4) if results else 0.0,
+        "errors": dict(errors),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 1),
+            "p90": round(percentile(latencies, 90), 1),
+            "p95": round(percentile(latencies, 95), 1),
+            "p99": round(percentile(latencies, 99), 1),
+            "max": round(max(latencies, default=0.0), 1),
+        },
+        # How late requests started against the --rate schedule
+        "start_lag_ms": {
+            "p50": round(percentile([lag for _, _, lag in results], 50), 1),
+            "max": round(max((lag for _, _, lag in results), default=0.0), 1),
+        },
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Ask the event assistant, or replay questions against it as load.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--replay", help="text file of questions, one per line, sent in order")
+    source.add_argument("--mix", help='JSON list of {"question", "weight"} to sample questions from')
+    parser.add_argument("--requests", type=int, default=None,
+                        help="questions to send (default: the replay file once, or 100 from a mix)")
+    parser.add_argument("--concurrency", type=int, default=4, help="requests in flight at once, at most")
+    parser.add_argument("--rate", type=float, default=0.0,
+                        help="requests per second overall, 0 for as fast as possible; held only while "
+                             "rate x latency stays below --concurrency")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for sampling the mix")
+    args = parser.parse_args()
+
+    if not (args.replay or args.mix):
+        if wait_for_server():
+            interactive()
+        return
+
+    if args.replay:
+        lines = read_replay(args.replay)
+        if not lines:
+            parser.error(f"{args.replay} has no questions")
+        count = args.requests or len(lines)
+        questions = [lines[i % len(lines)] for i in range(count)]
+    else:
+        choices, weights = read_mix(args.mix)
+        if not choices:
+            parser.error(f"{args.mix} has no questions")
+        questions = random.Random(args.seed).choices(choices, weights=weights, k=args.requests or 100)
+    if not wait_for_server():
+        return
+
+    result = replay(questions, max(1, args.concurrency), args.rate)
+    latency = result["latency_ms"]
+    print(f"{result['requests']} requests in {result['seconds']}s ({result['throughput']} req/s), "
+          f"error rate {result['error_rate']:.2%}")
+    print(f"latency ms: p50 {latency['p50']} p90 {latency['p90']} p95 {latency['p95']} "
+          f"p99 {latency['p99']} max {latency['max']}")
+    if args.rate > 0:
+        lag = result["start_lag_ms"]
+        print(f"start lag ms: p50 {lag['p50']} max {lag['max']} (behind the --rate schedule)")
+    for outcome, count in sorted(result["errors"].items()):
+        print(f"  {outcome}: {count}")
+
 if __name__ == "__main__":
     main()
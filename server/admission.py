@@ -0,0 +1,94 @@
+import asyncio
+import math
+import os
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+class Overloaded(Exception):
+    """Request refused for lack of capacity; maps to a 429/503 with Retry-After"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """Bounded LLM concurrency with a bounded, deadline-limited wait queue.
+
+    At most `max_concurrency` holders run at once and at most `max_queue`
+    wait; a waiter that isn't admitted within `queue_timeout` seconds is
+    refused. With `per_client_limit`, one client can't hold more than that
+    many running or queued slots, so a single noisy caller can't fill the queue.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float, per_client_limit: int = 0):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.per_client_limit = per_client_limit
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.active = 0
+        self.waiting = 0
+        self.per_client = defaultdict(int)
+        self.rejected = defaultdict(int)
+        # Moving average of how long a slot is held, for Retry-After
+        self.service_seconds = 1.0
+
+    def retry_after(self) -> int:
+        backlog = (self.waiting + 1) / self.max_concurrency
+        return max(1, math.ceil(backlog * self.service_seconds))
+
+    def _refuse(self, reason: str, status_code: int, detail: str):
+        self.rejected[reason] += 1
+        raise Overloaded(status_code, detail, self.retry_after())
+
+    def check(self, client: str = None):
+        """Refuse early, without reserving anything, if a slot request would be refused now"""
+        if self.per_client_limit and client is not None and self.per_client[client] >= self.per_client_limit:
+            self._refuse("client_limit", 429, "Too many concurrent questions from this client")
+        if self.semaphore.locked() and self.waiting >= self.max_queue:
+            self._refuse("queue_full", 503, "Server is at capacity, please retry")
+
+    @asynccontextmanager
+    async def slot(self, client: str = None):
+        self.check(client)
+        self.per_client[client] += 1
+        try:
+            self.waiting += 1
+            try:
+                async with asyncio.timeout(self.queue_timeout):
+                    await self.semaphore.acquire()
+            except TimeoutError:
+                self._refuse("queue_timeout", 503, "Timed out waiting for capacity, please retry")
+            finally:
+                self.waiting -= 1
+            
+            self.active += 1
+            started = time.monotonic()
+            try:
+                yield
+            finally:
+                self.active -= 1
+                self.semaphore.release()
+                self.service_seconds = 0.9 * self.service_seconds + 0.1 * (time.monotonic() - started)
+        finally:
+            self.per_client[client] -= 1
+            if not self.per_client[client]:
+                del self.per_client[client]
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "clients": len(self.per_client),
+            **{f"rejected_{reason}": count for reason, count in self.rejected.items()}
+        }
+
+admission = AdmissionController(
+    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "32")),
+    max_queue=int(os.getenv("LLM_MAX_QUEUE", "256")),
+    queue_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT", "10")),
+    per_client_limit=int(os.getenv("LLM_PER_CLIENT_LIMIT", "0"))
+)
@@ -0,0 +1,85 @@
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Optional
+
+def normalize_question(question: str) -> str:
+    """Case-, whitespace- and punctuation-insensitive form of a question"""
+    return " ".join(re.sub(r"[^\w\s]", " ", question.lower()).split())
+
+class AnswerCache:
+    """LRU answer cache with a TTL, bounded by entry count and bytes.
+
+    Entries belong to one data version; seeing a new version drops them all.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.version = None
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self, version):
+        if version != self.version:
+            if self.entries:
+                self.invalidations += 1
+            self.entries.clear()
+            self.bytes = 0
+            self.version = version
+
+    def _remove(self, key):
+        _, _, size = self.entries.pop(key)
+        self.bytes -= size
+
+    def get(self, question: str, version) -> Optional[str]:
+        self._check_version(version)
+        key = normalize_question(question)
+        entry = self.entries.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, question: str, version, answer: str):
+        self._check_version(version)
+        key = normalize_question(question)
+        size = len(key.encode()) + len(answer.encode())
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        if key in self.entries:
+            self._remove(key)
+        self.entries[key] = (answer, time.monotonic() + self.ttl, size)
+        self.bytes += size
+        while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "data_version": self.version
+        }
+
+answer_cache = AnswerCache(
+    max_entries=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1024")),
+    max_bytes=int(os.getenv("ANSWER_CACHE_MAX_BYTES", str(8 * 1024 * 1024))),
+    ttl=float(os.getenv("ANSWER_CACHE_TTL", "300"))
+)
@@ -1,14 +1,67 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
 
-engine = create_engine(DATABASE_URL)
+# Async drivers for the same database: asyncpg for Postgres, aiosqlite for SQLite
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def to_async_url(url: str) -> str:
+    """Rewrite a sync database URL to use the matching async driver"""
+    scheme, sep, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+def pool_options(url: str) -> dict:
+    """Connection pool settings, tunable through DB_POOL_* environment variables"""
+    options = {"pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"}
+    if url.startswith("sqlite"):
+        # SQLite uses a file or memory pool; size limits don't apply
+        return options
+    options.update(
+        pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    )
+    return options
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_url(DATABASE_URL))
+
+engine = create_engine(DATABASE_URL, **pool_options(DATABASE_URL))
 Session = sessionmaker(bind=engine)
 
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **pool_options(ASYNC_DATABASE_URL))
+AsyncSession = async_sessionmaker(async_engine, expire_on_commit=False)
+
 Base = declarative_base()
 
 def init_db():
-    from models import Event, Location, Speaker
+    from models import Event, Location, Speaker, DataVersion
+    import migrations
     Base.metadata.create_all(bind=engine)
+    migrations.run(engine)
+
+def bump_data_version(conn):
+    """Record that events/speakers/locations changed, so in-memory snapshots reload.
+
+    Takes a Session or Connection; the bump commits with the caller's transaction.
+    """
+    from models import DataVersion
+    table = DataVersion.__table__
+    updated = conn.execute(table.update().where(table.c.id == 1).values(version=table.c.version + 1))
+    if not updated.rowcount:
+        conn.execute(table.insert().values(id=1, version=1))
+
+async def get_data_version() -> int:
+    """Current data version (0 until the first bump)"""
+    from models import DataVersion
+    async with AsyncSession() as session:
+        version = await session.scalar(select(DataVersion.version).where(DataVersion.id == 1))
+        return version or 0
@@ -0,0 +1,84 @@
+"""Conditional GET and compression for the read-only REST endpoints.
+
+ETags combine the data version with the request's path and query, so a
+client polling an unchanged schedule gets `304 Not Modified` before any
+query runs. Bodies are compressed with brotli when the `brotli` package is
+installed and the client accepts it, else gzip.
+"""
+import gzip
+import hashlib
+import json
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Smaller bodies are sent uncompressed
+MIN_COMPRESS_BYTES = 512
+
+def accepted_encodings(request: Request) -> set:
+    encodings = set()
+    for part in request.headers.get("accept-encoding", "").split(","):
+        coding, *params = part.split(";")
+        weight = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if weight > 0:
+            encodings.add(coding.strip().lower())
+    return encodings
+
+def choose_encoding(request: Request) -> str:
+    accepted = accepted_encodings(request)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return "identity"
+
+def etag(version: int, request: Request, encoding: str) -> str:
+    """Strong validator for this representation: data version, request and content coding"""
+    query = sorted(request.query_params.multi_items())
+    digest = hashlib.sha1(json.dumps([request.url.path, query]).encode()).hexdigest()[:16]
+    suffix = "" if encoding == "identity" else f"-{encoding}"
+    return f'"{version}-{digest}{suffix}"'
+
+def cached_tags(request: Request) -> set:
+    header = request.headers.get("if-none-match", "")
+    # If-None-Match uses weak comparison
+    return {candidate.strip().removeprefix("W/") for candidate in header.split(",") if candidate.strip()}
+
+def headers(tag: str, encoding: str) -> dict:
+    headers = {"ETag": tag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return headers
+
+def not_modified(request: Request, version: int):
+    """A 304 response if the client's cached copy is current, else None"""
+    cached = cached_tags(request)
+    # Small bodies go out uncompressed, so the identity tag is current too
+    for encoding in dict.fromkeys((choose_encoding(request), "identity")):
+        tag = etag(version, request, encoding)
+        if tag in cached or "*" in cached:
+            return Response(status_code=304, headers=headers(tag, encoding))
+    return None
+
+def json_response(request: Request, payload, version: int) -> Response:
+    """JSON body tagged with the data version, compressed as the client allows"""
+    body = json.dumps(payload, separators=(",", ":")).encode()
+    encoding = choose_encoding(request) if len(body) >= MIN_COMPRESS_BYTES else "identity"
+    if encoding == "br":
+        body = brotli.compress(body, quality=5)
+    elif encoding == "gzip":
+        body = gzip.compress(body, compresslevel=6)
+    tag = etag(version, request, encoding)
+    return Response(content=body, media_type="application/json", headers=headers(tag, encoding))
@@ -1,216 +1,608 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
+from typing import List, Optional
+import asyncio
 import json
 import os
-from openai import OpenAI
+import shutil
+import sys
+import tempfile
+import time
 
 # Import the MCP server and functions
-from server import mcp, get_schedule, get_talk_by_time, get_location, get_speaker_info
-from db import init_db
+from server import (
+    DEFAULT_PAGE_SIZE, query_directory, query_schedule, encode_schedule, parse_fields, has_events,
+    get_mcp, get_schedule, get_talk_by_time, get_event_details, get_talks_at, get_talks_between, get_location, get_speaker_info,
+    search_events, search_speakers
+)
+from db import init_db, async_engine
+from models import Location, Speaker
+from registry import ToolRegistry
+import snapshot
+from cache import answer_cache, normalize_question
+from router import IntentRouter
+from singleflight import SingleFlight
+from admission import Overloaded, admission
+import metrics
+from metrics import stage
+import sessions
+import httpcache
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-init_db()
+# Created on first use: importing the OpenAI SDK is slow and not needed to serve /health
+client = None
+
+def openai_client():
+    global client
+    if client is None:
+        import openai
+        client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return client
+
+def is_rate_limit(e: Exception) -> bool:
+    """Whether `e` is the OpenAI SDK's rate-limit error; without the SDK loaded it cannot be"""
+    openai = sys.modules.get("openai")
+    return openai is not None and isinstance(e, openai.RateLimitError)
 
 app = FastAPI(title="Event Assistant API")
+app.add_middleware(metrics.TimingMiddleware)
+metrics.instrument_engine(async_engine.sync_engine)
 
-@app.on_event("startup")
-async def startup_event():
-    """Seed the database with initial data if it's empty"""
+# Connections opened at warm-up so the first requests don't pay for connecting
+WARM_CONNECTIONS = int(os.getenv("DB_WARM_CONNECTIONS", "4"))
+# Seconds to wait before retrying a failed warm-up
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "5"))
+
+# Worker processes; with more than one they share a snapshot file and metrics directory
+WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+# Address and log level used by `python main.py`
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+LOG_LEVEL = os.getenv("LOG_LEVEL", "info")
+# Set by the parent process once it has created the schema and seeded the data
+DATABASE_PREPARED = os.getenv("DATABASE_PREPARED", "false").lower() == "true"
+
+# Warm-up progress, reported by /ready
+readiness = {"ready": False, "seconds": None, "steps": {}, "error": None}
+
+async def timed(step: str, fn):
+    """Run one warm-up step and record its duration; a step that already finished is skipped on retry"""
+    if step in readiness["steps"]:
+        return None
+    started = time.perf_counter()
+    result = await fn()
+    readiness["steps"][step] = round(time.perf_counter() - started, 3)
+    return result
+
+async def warm_pool():
+    async def connect():
+        async with async_engine.connect() as conn:
+            await conn.exec_driver_sql("SELECT 1")
+    await asyncio.gather(*(connect() for _ in range(WARM_CONNECTIONS)))
+
+async def seed_if_empty():
+    if not await has_events():
+        from seed import seed
+        print(f"Seeded empty database: {await asyncio.to_thread(seed)}")
+
+async def warm_database():
+    if not DATABASE_PREPARED:
+        await timed("schema", lambda: asyncio.to_thread(init_db))
+    await timed("pool", warm_pool)
+    if not DATABASE_PREPARED:
+        await timed("seed", seed_if_empty)
+    await timed("snapshot", snapshot.store.load)
+
+async def warm_tools():
+    # The SDK imports run in a thread so the event loop keeps serving
+    await timed("mcp_import", lambda: asyncio.to_thread(get_mcp))
+    await timed("tool_schema", tool_registry.refresh)
+    # Without a key the client cannot be built, and questions get a "not
+    # configured" answer anyway, so this step never holds up readiness
+    if not os.getenv("OPENAI_API_KEY"):
+        return
     try:
-        schedule = get_schedule()
-        if not schedule:
-            import subprocess
-            import os
-            
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            seed_path = os.path.join(current_dir, "seed.py")
-            
-            result = subprocess.run(["python", seed_path], capture_output=True, text=True)
-            if result.returncode != 0:
-                print(f"Error running seed script: {result.stderr}")
+        await timed("openai_import", lambda: asyncio.to_thread(openai_client))
     except Exception as e:
-        print(f"Error during startup: {e}")
+        print(f"OpenAI client not created during warm-up: {e}")
+
+async def warm_up():
+    """Prepare everything a request needs, then mark the server ready"""
+    started = time.perf_counter()
+    while True:
+        try:
+            # Both halves run to the end, so a retry only repeats the steps that failed
+            results = await asyncio.gather(warm_database(), warm_tools(), return_exceptions=True)
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+            break
+        except Exception as e:
+            readiness["error"] = str(e)
+            print(f"Error during startup, retrying in {WARMUP_RETRY_SECONDS}s: {e}")
+            await asyncio.sleep(WARMUP_RETRY_SECONDS)
+    
+    readiness.update(ready=True, error=None, seconds=round(time.perf_counter() - started, 3))
+    steps = ", ".join(f"{step} {seconds}s" for step, seconds in readiness["steps"].items())
+    print(f"Ready in {readiness['seconds']}s ({steps})")
+
+@app.on_event("startup")
+async def startup_event():
+    """Start warming up in the background so the server answers /health at once"""
+    app.state.warm_up = asyncio.create_task(warm_up())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop a warm-up still in progress and close pooled database connections"""
+    app.state.warm_up.cancel()
+    await async_engine.dispose()
 
 class QuestionRequest(BaseModel):
     question: str
+    # Continue a conversation the server issued: earlier turns are sent as context
+    session_id: Optional[str] = None
+    # Start a conversation; its id comes back as session_id
+    new_session: bool = False
 
 class AnswerResponse(BaseModel):
     answer: str
+    session_id: Optional[str] = None
+
+class BatchQuestionRequest(BaseModel):
+    questions: List[QuestionRequest]
+
+class BatchAnswer(BaseModel):
+    answer: Optional[str] = None
+    error: Optional[str] = None
+    status_code: int = 200
+
+class BatchAnswerResponse(BaseModel):
+    answers: List[BatchAnswer]
+    session_id: Optional[str] = None
+
+# Questions accepted per /ask/batch call, and answered at once within one
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "50"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+MODEL = "gpt-3.5-turbo"
+
+# Tool calls from one model turn that may run at the same time, per request
+MAX_TOOL_CONCURRENCY = int(os.getenv("MAX_TOOL_CONCURRENCY", "4"))
+# Model turns allowed to request tools before the final answer is forced
+MAX_TOOL_ROUNDS = int(os.getenv("MAX_TOOL_ROUNDS", "1"))
+
+SYSTEM_PROMPT = """You are an intelligent event assistant with access to a conference database. 
+
+Use the available tools to answer questions about events, speakers, schedules, and venues. Always call the appropriate tools rather than guessing. When a tool result has a note that more events match than were listed, say that your answer covers only part of them and how many more there are."""
 
 # Function mapping for direct calls
 FUNCTION_MAP = {
     "get_schedule": get_schedule,
     "get_talk_by_time": get_talk_by_time,
+    "get_event_details": get_event_details,
+    "get_talks_at": get_talks_at,
+    "get_talks_between": get_talks_between,
     "get_location": get_location,
-    "get_speaker_info": get_speaker_info
+    "get_speaker_info": get_speaker_info,
+    "search_events": search_events,
+    "search_speakers": search_speakers
 }
 
+tool_registry = ToolRegistry(get_mcp)
+
+# Template answers for simple lookups, skipping the LLM when it is sure
+ROUTER_ENABLED = os.getenv("ROUTER_ENABLED", "true").lower() == "true"
+intent_router = IntentRouter(FUNCTION_MAP)
+
+# Identical questions asked at the same time share one LLM pipeline run
+inflight = SingleFlight()
+
 async def get_mcp_tools():
-    """Get tool definitions from MCP server"""
-    try:
-        tools_response = await mcp.list_tools()
-        tools = []
-        
-        for tool in tools_response.tools:
-            openai_tool = {
-                "type": "function",
-                "function": {
-                    "name": tool.name,
-                    "description": tool.description,
-                    "parameters": tool.inputSchema or {
-                        "type": "object",
-                        "properties": {},
-                        "required": []
-                    }
-                }
-            }
-            tools.append(openai_tool)
-        
-        return tools
-    except Exception as e:
-        # Fallback to basic tool definitions if MCP fails
-        return [
-            {
-                "type": "function",
-                "function": {
-                    "name": "get_schedule",
-                    "description": "Get the complete event schedule with all talks, times, locations, and speakers",
-                    "parameters": {"type": "object", "properties": {}, "required": []}
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "get_talk_by_time",
-                    "description": "Find a specific event/talk happening at a given time",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "time": {"type": "string", "description": "The time to search for (e.g., '10:00', '14:30')"}
-                        },
-                        "required": ["time"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "get_location",
-                    "description": "Get information about a specific venue or location",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "name": {"type": "string", "description": "The name of the location/venue"}
-                        },
-                        "required": ["name"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "get_speaker_info",
-                    "description": "Get biographical information about a specific speaker",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "name": {"type": "string", "description": "The name of the speaker"}
-                        },
-                        "required": ["name"]
-                    }
-                }
-            }
-        ]
-
-def call_function(name: str, arguments: dict) -> str:
+    """Get tool definitions from MCP server (built once, cached in the registry)"""
+    with stage("tool_schema"):
+        return await tool_registry.get()
+
+async def call_function(name: str, arguments: dict) -> str:
     """Execute function calls directly"""
     try:
         if name in FUNCTION_MAP:
-            result = FUNCTION_MAP[name](**arguments)
-            return json.dumps(result) if isinstance(result, (dict, list)) else str(result)
+            with stage(f"tool_{name}"):
+                result = await FUNCTION_MAP[name](**arguments)
+            with stage("serialize"):
+                payload = json.dumps(result, separators=(",", ":")) if isinstance(result, (dict, list)) else str(result)
+            metrics.record_payload(name, payload)
+            return payload
         else:
             return f"Unknown function: {name}"
     except Exception as e:
         return f"Error calling {name}: {str(e)}"
 
-async def process_with_ai(question: str) -> str:
-    """Process question using AI with function tools"""
+async def execute_tool_calls(tool_calls) -> list:
+    """Run one turn's tool calls concurrently and return their tool messages in call order"""
+    semaphore = asyncio.Semaphore(MAX_TOOL_CONCURRENCY)
     
-    if question.lower() == "ping":
-        return "Server is ready!"
+    async def run(tool_call) -> str:
+        async with semaphore:
+            try:
+                function_args = json.loads(tool_call.function.arguments or "{}")
+            except json.JSONDecodeError as e:
+                return f"Invalid arguments for {tool_call.function.name}: {str(e)}"
+            return await call_function(tool_call.function.name, function_args)
     
-    try:
-        if not os.getenv("OPENAI_API_KEY"):
-            return "AI assistant is not configured. Please set OPENAI_API_KEY environment variable."
+    results = await asyncio.gather(*(run(tool_call) for tool_call in tool_calls))
+    
+    return [{
+        "role": "tool",
+        "tool_call_id": tool_call.id,
+        "content": result
+    } for tool_call, result in zip(tool_calls, results)]
+
+async def run_tools(question: str, history: list = ()):
+    """Run up to MAX_TOOL_ROUNDS tool-calling turns for a question.
+
+    `history` holds earlier conversation messages, sent between the system
+    prompt and the question.
+
+    Returns ``(messages, None)`` when a final completion is still needed, or
+    ``(None, answer)`` when the model answered without calling more tools.
+    """
+    # Get tools (try MCP first, fallback to manual definitions)
+    tools = await get_mcp_tools()
+    
+    messages = [
+        {
+            "role": "system",
+            "content": SYSTEM_PROMPT
+        },
+        *history,
+        {
+            "role": "user",
+            "content": question
+        }
+    ]
+    
+    for _ in range(MAX_TOOL_ROUNDS):
+        # Get response from OpenAI with tools
+        with stage("completion_tools"):
+            response = await openai_client().chat.completions.create(
+                model=MODEL,
+                messages=messages,
+                tools=tools,
+                tool_choice="auto"
+            )
+        metrics.record_usage(response.usage)
         
-        # Get tools (try MCP first, fallback to manual definitions)
-        tools = await get_mcp_tools()
+        response_message = response.choices[0].message
         
-        messages = [
-            {
-                "role": "system",
-                "content": """You are an intelligent event assistant with access to a conference database. 
-
-Use the available tools to answer questions about events, speakers, schedules, and venues. Always call the appropriate tools rather than guessing."""
-            },
-            {
-                "role": "user",
-                "content": question
-            }
-        ]
+        if not response_message.tool_calls:
+            return None, response_message.content
         
-        # Get response from OpenAI with tools
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=messages,
-            tools=tools,
-            tool_choice="auto"
+        messages.append(response_message)
+        messages.extend(await execute_tool_calls(response_message.tool_calls))
+    
+    return messages, None
+
+async def final_completion(messages: list) -> str:
+    # Get final response
+    with stage("completion_final"):
+        final_response = await openai_client().chat.completions.create(
+            model=MODEL,
+            messages=messages
         )
+    metrics.record_usage(final_response.usage)
+    
+    return final_response.choices[0].message.content
+
+class Turn:
+    """One question on its way through the pipeline, shared by /ask and /ask/stream.
+
+    `shortcut()` does everything before the model is called, and `record()`
+    everything after the answer is known, so the streaming and non-streaming
+    paths treat the router, conversations and the cache the same way.
+    """
+
+    def __init__(self, question: str, conversation=None):
+        self.question = question
+        self.conversation = conversation
+        self.history = []
+        self.version = None
+
+    async def shortcut(self) -> Optional[str]:
+        """The answer if no model call is needed (ping, routed lookup, missing key, cached answer), else None"""
+        if self.question.lower() == "ping":
+            return "Server is ready!"
         
-        response_message = response.choices[0].message
+        if ROUTER_ENABLED:
+            with stage("router"):
+                answer = await intent_router.route(self.question)
+            if answer is not None:
+                self.record(answer)
+                return answer
         
-        if response_message.tool_calls:
-            messages.append(response_message)
-            
-            # Execute tool calls
-            for tool_call in response_message.tool_calls:
-                function_name = tool_call.function.name
-                function_args = json.loads(tool_call.function.arguments)
-                function_response = call_function(function_name, function_args)
-                
-                messages.append({
-                    "role": "tool",
-                    "tool_call_id": tool_call.id,
-                    "content": function_response
-                })
-            
-            # Get final response
-            final_response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=messages
+        if not os.getenv("OPENAI_API_KEY"):
+            return "AI assistant is not configured. Please set OPENAI_API_KEY environment variable."
+        
+        self.version = await snapshot.store.data_version()
+        if self.conversation is not None:
+            # Follow-ups depend on history, so they neither use nor fill the cache
+            self.history = self.conversation.context(sessions.SESSION_TOKEN_BUDGET)
+            return None
+        return answer_cache.get(self.question, self.version)
+
+    def record(self, answer: str, messages: list = None):
+        """Keep a finished answer: as a turn of the conversation if there is one, else in the shared cache"""
+        if self.conversation is not None:
+            # Everything after the system prompt, history and question
+            tool_messages = messages[len(self.history) + 2:] if messages else []
+            self.conversation.record(self.question, tool_messages, answer or "", sessions.SESSION_MAX_TURNS)
+        elif answer and self.version is not None:
+            answer_cache.put(self.question, self.version, answer)
+
+def open_conversation(session_id: Optional[str], new_session: bool):
+    """The conversation a request continues or starts, or None for a one-off question.
+
+    Only ids the server issued are accepted, so a client cannot read or
+    extend another client's history by guessing a name for it.
+    """
+    if session_id:
+        conversation = sessions.conversations.get(session_id)
+        if conversation is None:
+            raise HTTPException(
+                status_code=404, detail="Unknown or expired session_id; send new_session=true to start a conversation"
             )
+        return conversation
+    return sessions.conversations.start() if new_session else None
+
+def client_id(http_request: Request):
+    """Identity used for per-client admission limits"""
+    return http_request.headers.get("x-client-id") or (http_request.client.host if http_request.client else None)
+
+def provider_overloaded(e: Exception) -> Overloaded:
+    """Turn an OpenAI rate-limit error into a 503, keeping the provider's Retry-After"""
+    retry_after = e.response.headers.get("retry-after", "") if e.response is not None else ""
+    return Overloaded(
+        503, "The AI provider is rate limiting requests, please retry",
+        int(float(retry_after)) if retry_after.replace(".", "", 1).isdigit() else admission.retry_after()
+    )
+
+async def process_with_ai(question: str, client_key: str = None, conversation=None) -> str:
+    """Process question using AI with function tools.
+
+    With a `conversation`, earlier turns are used as context and the answer
+    bypasses the shared cache. Raises Overloaded when there is no LLM
+    capacity for the question.
+    """
+    turn = Turn(question, conversation)
+    try:
+        answer = await turn.shortcut()
+        if answer is not None:
+            return answer
+        
+        async def compute() -> str:
+            async with admission.slot(client_key):
+                try:
+                    messages, answer = await run_tools(question, turn.history)
+                    if messages is not None:
+                        answer = await final_completion(messages)
+                except Exception as e:
+                    if is_rate_limit(e):
+                        raise provider_overloaded(e) from e
+                    raise
+            turn.record(answer, messages)
+            return answer
+        
+        if conversation is not None:
+            return await compute()
+        return await inflight.do((normalize_question(question), turn.version), compute)
             
-            return final_response.choices[0].message.content
-        else:
-            return response_message.content
-            
+    except Overloaded:
+        raise
     except Exception as e:
         return f"Sorry, I encountered an error while processing your question: {str(e)}"
 
+async def stream_with_ai(question: str, client_key: str = None, conversation=None):
+    """Like process_with_ai, but yields the final completion as it is generated"""
+    turn = Turn(question, conversation)
+    try:
+        answer = await turn.shortcut()
+        if answer is not None:
+            yield answer
+            return
+        
+        async with admission.slot(client_key):
+            try:
+                messages, answer = await run_tools(question, turn.history)
+                if messages is None:
+                    turn.record(answer)
+                    yield answer or ""
+                    return
+                
+                with stage("completion_final"):
+                    stream = await openai_client().chat.completions.create(
+                        model=MODEL,
+                        messages=messages,
+                        stream=True,
+                        stream_options={"include_usage": True}
+                    )
+                    
+                    parts = []
+                    async for chunk in stream:
+                        if chunk.usage:
+                            metrics.record_usage(chunk.usage)
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            parts.append(chunk.choices[0].delta.content)
+                            yield chunk.choices[0].delta.content
+            except Exception as e:
+                if is_rate_limit(e):
+                    raise provider_overloaded(e) from e
+                raise
+        
+        turn.record("".join(parts), messages)
+            
+    except Overloaded as e:
+        yield f"Sorry, the assistant is busy right now. Please try again in {e.retry_after} seconds."
+    except Exception as e:
+        yield f"Sorry, I encountered an error while processing your question: {str(e)}"
+
 @app.post("/ask", response_model=AnswerResponse)
-async def ask_question(request: QuestionRequest) -> AnswerResponse:
+async def ask_question(request: QuestionRequest, http_request: Request) -> AnswerResponse:
     """Main endpoint for asking questions to the event assistant using AI"""
+    conversation = open_conversation(request.session_id, request.new_session)
     try:
-        answer = await process_with_ai(request.question)
-        return AnswerResponse(answer=answer)
+        answer = await process_with_ai(request.question, client_id(http_request), conversation)
+        return AnswerResponse(answer=answer, session_id=conversation.id if conversation else None)
+    except Overloaded as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing question: {str(e)}")
 
+@app.post("/ask/batch", response_model=BatchAnswerResponse)
+async def ask_batch(request: BatchQuestionRequest, http_request: Request) -> BatchAnswerResponse:
+    """Answer several questions in one call; answers come back in request order"""
+    if len(request.questions) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_SIZE} questions per batch")
+    
+    client_key = client_id(http_request)
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    
+    # Questions of one conversation must run in order, so a batch carrying a
+    # session_id is answered sequentially in that conversation
+    session_ids = {item.session_id for item in request.questions}
+    if len(session_ids) > 1:
+        raise HTTPException(status_code=422, detail="All questions in a batch must share the same session_id")
+    conversation = open_conversation(next(iter(session_ids), None), any(item.new_session for item in request.questions))
+    if conversation is not None:
+        semaphore = asyncio.Semaphore(1)
+    
+    async def answer(question: str) -> BatchAnswer:
+        async with semaphore:
+            try:
+                return BatchAnswer(answer=await process_with_ai(question, client_key, conversation))
+            except Overloaded as e:
+                return BatchAnswer(error=e.detail, status_code=e.status_code)
+            except Exception as e:
+                return BatchAnswer(error=f"Error processing question: {str(e)}", status_code=500)
+    
+    # Answer each distinct question once, then fan the answers back out
+    unique = {}
+    for item in request.questions:
+        unique.setdefault(normalize_question(item.question), item.question)
+    results = dict(zip(unique, await asyncio.gather(*(answer(q) for q in unique.values()))))
+    
+    return BatchAnswerResponse(
+        answers=[results[normalize_question(item.question)] for item in request.questions],
+        session_id=conversation.id if conversation else None
+    )
+
+@app.post("/ask/stream")
+async def ask_question_stream(request: QuestionRequest, http_request: Request) -> StreamingResponse:
+    """Stream the answer as server-sent events, one ``data:`` line per token chunk"""
+    client_key = client_id(http_request)
+    try:
+        # Refuse before the 200 and headers are sent; later refusals arrive as a token
+        admission.check(client_key)
+    except Overloaded as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers={"Retry-After": str(e.retry_after)})
+    
+    conversation = open_conversation(request.session_id, request.new_session)
+    
+    async def event_stream():
+        async for token in stream_with_ai(request.question, client_key, conversation):
+            yield f"data: {json.dumps({'token': token})}\n\n"
+        yield "data: [DONE]\n\n"
+    
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if conversation is not None:
+        headers["X-Session-Id"] = conversation.id
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=headers)
+
+@app.get("/events")
+async def list_events(request: Request, location: str = "", speaker: str = "", start: str = "", end: str = "",
+                      day: str = "", fields: str = "", limit: int = DEFAULT_PAGE_SIZE, cursor: str = "",
+                      format: str = "records") -> Response:
+    """The schedule with the same filters and paging as the get_schedule tool, no LLM involved"""
+    version = await snapshot.store.data_version()
+    if (cached := httpcache.not_modified(request, version)) is not None:
+        return cached
+    try:
+        events, next_cursor, more = await query_schedule(location, speaker, start, end, day, limit, cursor)
+        payload = encode_schedule(events, parse_fields(fields), format, next_cursor, more)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return httpcache.json_response(request, payload, version)
+
+async def directory_response(request: Request, model, key: str, name: str, limit: int, cursor: str) -> Response:
+    version = await snapshot.store.data_version()
+    if (cached := httpcache.not_modified(request, version)) is not None:
+        return cached
+    try:
+        entries, next_cursor = await query_directory(model, name, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return httpcache.json_response(request, {key: entries, "next_cursor": next_cursor}, version)
+
+@app.get("/speakers")
+async def list_speakers(request: Request, name: str = "", limit: int = DEFAULT_PAGE_SIZE, cursor: str = "") -> Response:
+    """Speakers and their bios in id order, optionally only those whose name contains `name`"""
+    return await directory_response(request, Speaker, "speakers", name, limit, cursor)
+
+@app.get("/locations")
+async def list_locations(request: Request, name: str = "", limit: int = DEFAULT_PAGE_SIZE, cursor: str = "") -> Response:
+    """Locations and their descriptions in id order, optionally only those whose name contains `name`"""
+    return await directory_response(request, Location, "locations", name, limit, cursor)
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Answer cache size and hit/miss counters"""
+    return answer_cache.stats()
+
+@app.get("/metrics")
+async def prometheus_metrics() -> Response:
+    """Prometheus metrics: stage latencies, DB query times, tool payload sizes, token counts"""
+    body, content_type = metrics.render(answer_cache.stats(), inflight.stats(), admission.stats())
+    return Response(content=body, media_type=content_type)
+
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Liveness: the process is up, whether or not warm-up has finished"""
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: 200 once the schema, pool, data, snapshot and tool schema are warm, else 503"""
+    if readiness["ready"]:
+        return {"status": "ready", **readiness}
+    return JSONResponse(status_code=503, content={"status": "starting", **readiness})
+
+def prepare_workers():
+    """Set up what the worker processes share; runs once in the parent before they start.
+
+    Only `python main.py` calls this: workers started by the uvicorn CLI
+    (`--workers` or WEB_CONCURRENCY) would each seed and snapshot on their own.
+    """
+    init_db()
+    if not asyncio.run(has_events()):
+        from seed import seed
+        print(f"Seeded empty database: {seed()}")
+    os.environ["DATABASE_PREPARED"] = "true"
+    
+    # A snapshot file left by an earlier run may describe another database
+    path = os.environ.setdefault("SNAPSHOT_PATH", os.path.join(tempfile.gettempdir(), "event-assistant-snapshot.bin"))
+    if os.path.exists(path):
+        os.remove(path)
+    
+    # Metric files from an earlier run would be added to this run's totals
+    metrics_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if metrics_dir:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        os.makedirs(metrics_dir)
+    else:
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="event-assistant-metrics-")
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    if WORKERS > 1:
+        prepare_workers()
+        uvicorn.run("main:app", host=HOST, port=PORT, workers=WORKERS, log_level=LOG_LEVEL)
+    else:
+        uvicorn.run(app, host=HOST, port=PORT, log_level=LOG_LEVEL) 
\ No newline at end of file
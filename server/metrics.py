@@ -0,0 +1,136 @@
+"""Prometheus metrics and per-request stage timings.
+
+`stage()` times a block into the stage histogram and, while a request is being
+served, into that request's timings, which TimingMiddleware can return as a
+Server-Timing header.
+"""
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+from sqlalchemy import event
+
+# Set (before prometheus_client is imported) when several worker processes
+# serve the app, so /metrics aggregates all of them
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+# Add a Server-Timing header with each request's stage durations
+TIMING_HEADERS = os.getenv("TIMING_HEADERS", "false").lower() == "true"
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+STAGE_SECONDS = Histogram(
+    "event_assistant_stage_seconds", "Time spent in each stage of answering a question",
+    ["stage"], buckets=LATENCY_BUCKETS
+)
+DB_QUERY_SECONDS = Histogram(
+    "event_assistant_db_query_seconds", "Database statement execution time", buckets=LATENCY_BUCKETS
+)
+TOOL_PAYLOAD_BYTES = Histogram(
+    "event_assistant_tool_payload_bytes", "Size of serialized tool results sent to the model",
+    ["tool"], buckets=(64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+)
+LLM_TOKENS = Counter(
+    "event_assistant_llm_tokens_total", "Tokens reported by OpenAI responses", ["kind"]
+)
+ANSWER_CACHE = Gauge(
+    "event_assistant_answer_cache", "Answer cache counters, refreshed on scrape", ["field"],
+    multiprocess_mode="liveall"
+)
+
+COALESCING = Gauge(
+    "event_assistant_single_flight", "Questions that started or joined a shared LLM run, refreshed on scrape", ["field"],
+    multiprocess_mode="liveall"
+)
+
+ADMISSION = Gauge(
+    "event_assistant_admission", "LLM slots in use, queued waiters and refusals, refreshed on scrape", ["field"],
+    multiprocess_mode="liveall"
+)
+
+_timings = ContextVar("timings", default=None)
+
+@contextmanager
+def stage(name: str):
+    """Time a block as `name` in the stage histogram and the current request's timings"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.labels(name).observe(elapsed)
+        add_timing(name, elapsed)
+
+def add_timing(name: str, seconds: float):
+    timings = _timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+def record_usage(usage):
+    """Count prompt/completion tokens from an OpenAI response's usage block"""
+    if usage is None:
+        return
+    LLM_TOKENS.labels("prompt").inc(usage.prompt_tokens or 0)
+    LLM_TOKENS.labels("completion").inc(usage.completion_tokens or 0)
+
+def record_payload(tool: str, payload: str):
+    TOOL_PAYLOAD_BYTES.labels(tool).observe(len(payload.encode()))
+
+def instrument_engine(engine):
+    """Time every statement run through a (sync) SQLAlchemy engine"""
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        DB_QUERY_SECONDS.observe(elapsed)
+        add_timing("db", elapsed)
+
+def server_timing(timings: dict) -> str:
+    return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings.items())
+
+class TimingMiddleware:
+    """Collect stage timings per HTTP request and optionally return them as Server-Timing"""
+
+    def __init__(self, app, headers: bool = TIMING_HEADERS):
+        self.app = app
+        self.headers = headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        
+        timings = {}
+        token = _timings.set(timings)
+        started = time.perf_counter()
+        
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and self.headers:
+                timings["total"] = time.perf_counter() - started
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"server-timing", server_timing(timings).encode())]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timings.reset(token)
+
+def render(cache_stats: dict, single_flight_stats: dict, admission_stats: dict):
+    """Prometheus exposition of all metrics, with answer cache, single-flight and admission counters"""
+    for field in ("entries", "bytes", "hits", "misses", "evictions", "invalidations"):
+        ANSWER_CACHE.labels(field).set(cache_stats[field])
+    for field, value in single_flight_stats.items():
+        COALESCING.labels(field).set(value)
+    for field, value in admission_stats.items():
+        ADMISSION.labels(field).set(value)
+    if MULTIPROCESS:
+        # Per-process gauges carry a pid label and show each worker's last scrape
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,70 @@
+"""Schema upgrades for databases created by older versions.
+
+``create_all`` only creates missing tables, so columns, indexes and data
+added later are brought in here. Every step must be safe to run on each start.
+"""
+from sqlalchemy import bindparam, inspect, select, text
+
+from db import Base
+import search
+from timeslots import DEFAULT_DURATION, parse_time
+
+def add_missing_columns(conn):
+    """Add model columns and indexes that existing tables don't have yet"""
+    inspector = inspect(conn)
+    tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        present = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in present:
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(conn.dialect)}"
+                for fk in column.foreign_keys:
+                    ddl += f" REFERENCES {fk.column.table.name} ({fk.column.name})"
+                    if fk.ondelete:
+                        ddl += f" ON DELETE {fk.ondelete}"
+                conn.execute(text(ddl))
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+def backfill_event_times(conn):
+    """Derive start_minute/end_minute from the free-form time strings"""
+    events = Base.metadata.tables["events"]
+    rows = conn.execute(select(events.c.id, events.c.time).where(events.c.start_minute.is_(None))).all()
+    updates = []
+    for event_id, time in rows:
+        start = parse_time(time)
+        if start is not None:
+            updates.append({"event_id": event_id, "start": start, "end": start + DEFAULT_DURATION})
+    if updates:
+        conn.execute(
+            events.update()
+            .where(events.c.id == bindparam("event_id"))
+            .values(start_minute=bindparam("start"), end_minute=bindparam("end")),
+            updates,
+        )
+
+def backfill_event_foreign_keys(conn):
+    """Link events to their location and speaker rows by name"""
+    for fk, table, name in (("location_id", "locations", "location_name"), ("speaker_id", "speakers", "speaker_name")):
+        conn.execute(text(
+            f"UPDATE events SET {fk} = (SELECT {table}.id FROM {table} WHERE {table}.name = events.{name}) "
+            f"WHERE {fk} IS NULL AND {name} IS NOT NULL"
+        ))
+
+def create_search_indexes(conn):
+    """Full-text indexes for the search tools"""
+    search.create_indexes(conn)
+
+MIGRATIONS = [
+    add_missing_columns,
+    backfill_event_times,
+    backfill_event_foreign_keys,
+    create_search_indexes,
+]
+
+def run(engine):
+    with engine.begin() as conn:
+        for migration in MIGRATIONS:
+            migration(conn)
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Date, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import relationship
 from db import Base
 
 class Event(Base):
@@ -6,8 +7,20 @@ class Event(Base):
     id = Column(Integer, primary_key=True)
     name = Column(String)
     time = Column(String)
-    location_name = Column(String)
-    speaker_name = Column(String)
+    # Names are kept alongside the foreign keys so reads need no join
+    location_name = Column(String, index=True)
+    speaker_name = Column(String, index=True)
+    location_id = Column(Integer, ForeignKey("locations.id", ondelete="SET NULL"), index=True)
+    speaker_id = Column(Integer, ForeignKey("speakers.id", ondelete="SET NULL"), index=True)
+    # Normalized form of `time`: minutes after midnight, for range queries
+    day = Column(Date)
+    start_minute = Column(Integer, index=True)
+    end_minute = Column(Integer)
+
+    location = relationship("Location", back_populates="events")
+    speaker = relationship("Speaker", back_populates="events")
+
+    __table_args__ = (Index("ix_events_day_start_minute", "day", "start_minute"),)
 
 class Location(Base):
     __tablename__ = "locations"
@@ -15,8 +28,17 @@ class Location(Base):
     name = Column(String, unique=True)
     description = Column(String)
 
+    events = relationship("Event", back_populates="location")
+
 class Speaker(Base):
     __tablename__ = "speakers"
     id = Column(Integer, primary_key=True)
     name = Column(String, unique=True)
     bio = Column(String)
+
+    events = relationship("Event", back_populates="speaker")
+
+class DataVersion(Base):
+    __tablename__ = "data_version"
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,180 @@
+"""Approximate name lookup for speakers, locations and talk titles.
+
+Each NameIndex keeps the normalized words of every name and character
+trigrams of each distinct word, so a misspelled or partial name
+("auditorium", "isabela romano") resolves to ranked candidates without
+scanning the table. Titles are indexed once per talk, without session
+numbers, so the title index stays small however many sessions repeat.
+With each schedule snapshot an index whose names changed is rebuilt off
+the event loop and replaces the old one.
+"""
+import asyncio
+import os
+import re
+from collections import defaultdict
+from typing import Optional
+
+TITLES = ("dr ", "prof ", "professor ")
+
+# Repeated sessions of a talk are numbered ("Intro to Rust 2"); the title
+# index holds each talk once, without the number
+SESSION_NUMBER = re.compile(r"\s+\d+$")
+
+# Candidates below this score are not suggested
+MIN_SCORE = float(os.getenv("NAME_MIN_SCORE", "0.45"))
+# A best candidate is used in place of the requested name only above this
+# score and ahead of the runner-up by at least the margin
+ACCEPT_SCORE = float(os.getenv("NAME_ACCEPT_SCORE", "0.6"))
+ACCEPT_MARGIN = 0.1
+
+def normalize_name(name: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", name.lower()).split())
+
+def name_keys(name: str) -> list:
+    """Lookup keys for a name: normalized, and without an academic title"""
+    key = normalize_name(name)
+    keys = [key]
+    for title in TITLES:
+        if key.startswith(title):
+            keys.append(key[len(title):])
+    return keys
+
+def base_title(title: str) -> str:
+    return SESSION_NUMBER.sub("", title)
+
+def trigrams(word: str) -> set:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def word_similarity(query: str, word: str, query_grams: set, grams: set) -> float:
+    if query == word:
+        return 1.0
+    if len(query) >= 3 and word.startswith(query):
+        return 0.9
+    return 2 * len(query_grams & grams) / (len(query_grams) + len(grams))
+
+class NameIndex:
+    """Names by normalized key, by word, and words by trigram.
+
+    Fuzzy matching happens on the vocabulary of distinct words, which stays
+    small even when there are many names, and names are then scored by how
+    well their words cover the query's words.
+    """
+
+    def __init__(self):
+        self.words = {}
+        self.keys = defaultdict(set)
+        self.by_word = defaultdict(set)
+        self.word_grams = {}
+        self.postings = defaultdict(set)
+
+    def __len__(self):
+        return len(self.words)
+
+    def add(self, name: str):
+        if name in self.words:
+            return
+        # Titles are dropped so "Romano" and "Dr. Romano" look alike
+        key = name_keys(name)[-1]
+        self.words[name] = words = frozenset(key.split())
+        self.keys[key].add(name)
+        for word in words:
+            if word not in self.word_grams:
+                self.word_grams[word] = trigrams(word)
+                for gram in self.word_grams[word]:
+                    self.postings[gram].add(word)
+            self.by_word[word].add(name)
+
+    def synced(self, names) -> "NameIndex":
+        """This index if it holds exactly `names`, else a new index of them"""
+        names = set(names)
+        if names == self.words.keys():
+            return self
+        index = NameIndex()
+        for name in names:
+            index.add(name)
+        return index
+
+    def similar_words(self, query: str) -> dict:
+        """Vocabulary words close to one query word, with their similarity"""
+        query_grams = trigrams(query)
+        candidates = set()
+        for gram in query_grams:
+            candidates.update(self.postings.get(gram, ()))
+        similar = {}
+        for word in candidates:
+            score = word_similarity(query, word, query_grams, self.word_grams[word])
+            if score >= MIN_SCORE:
+                similar[word] = score
+        return similar
+
+    def resolve(self, query: str, limit: int = 5) -> list:
+        """(name, score) candidates for `query`, best first, scores in 0..1"""
+        key = name_keys(query)[-1]
+        if not key:
+            return []
+        exact = [(name, 1.0) for name in sorted(self.keys.get(key, ()))]
+        if exact:
+            return exact[:limit]
+
+        query_words = list(dict.fromkeys(key.split()))
+        # For each query word, every name containing a similar word with the
+        # best similarity among its words
+        matches = []
+        for query_word in query_words:
+            scores = {}
+            for word, similarity in sorted(self.similar_words(query_word).items(), key=lambda item: item[1]):
+                scores.update(dict.fromkeys(self.by_word[word], similarity))
+            matches.append(scores)
+        
+        # Names matching every query word if there are any, else any word
+        present = sorted((m.keys() for m in matches if m), key=len)
+        if not present:
+            return []
+        names = set(present[0]).intersection(*present[1:]) or set().union(*present)
+
+        scored = []
+        for name in names:
+            coverage = sum(m.get(name, 0.0) for m in matches) / len(query_words)
+            words = len(self.words[name])
+            score = coverage * (0.7 + 0.3 * len(query_words) / max(len(query_words), words))
+            if score >= MIN_SCORE:
+                scored.append((name, round(score, 3)))
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit]
+
+    def best(self, query: str) -> Optional[str]:
+        """The name `query` most likely means, or None if no candidate is clearly ahead"""
+        candidates = self.resolve(query, limit=2)
+        if not candidates or candidates[0][1] < ACCEPT_SCORE:
+            return None
+        if len(candidates) > 1 and candidates[0][1] - candidates[1][1] < ACCEPT_MARGIN:
+            return None
+        return candidates[0][0]
+
+speakers = NameIndex()
+locations = NameIndex()
+titles = NameIndex()
+
+def synced(snap) -> tuple:
+    return (
+        speakers.synced(snap.speakers),
+        locations.synced(snap.locations),
+        titles.synced({base_title(name) for name in snap.titles() if name}),
+    )
+
+async def sync(snap):
+    """Bring the indexes up to date with a newly loaded snapshot.
+
+    Changed indexes are rebuilt in a thread and swapped in whole, so lookups
+    on the event loop neither wait for the rebuild nor see a partial index.
+    """
+    global speakers, locations, titles
+    speakers, locations, titles = await asyncio.to_thread(synced, snap)
+
+def suggestion(kind: str, index: NameIndex, query: str) -> str:
+    """Reply for a name that could not be resolved, listing close candidates"""
+    candidates = [name for name, _ in index.resolve(query)]
+    if not candidates:
+        return f"Unknown {kind}"
+    return f"Unknown {kind}. Did you mean: {', '.join(candidates)}?"
@@ -0,0 +1,236 @@
+import inspect
+
+# Hand-written schema used when the MCP server can't describe its tools
+FALLBACK_TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "get_schedule",
+            "description": "Get the event schedule (talks, times, locations, speakers) one page at a time, with optional filters",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "location": {"type": "string", "description": "Only events at this exact location"},
+                    "speaker": {"type": "string", "description": "Only events by this exact speaker"},
+                    "start": {"type": "string", "description": "Start of a time window (e.g., '14:00')"},
+                    "end": {"type": "string", "description": "End of a time window (e.g., '16:00')"},
+                    "day": {"type": "string", "description": "Only events on this day (YYYY-MM-DD)"},
+                    "fields": {"type": "string", "description": "Comma-separated subset of id,name,time,day,location_name,speaker_name"},
+                    "limit": {"type": "integer", "description": "Page size (default 50, max 200)"},
+                    "cursor": {"type": "string", "description": "next_cursor from the previous page"},
+                    "format": {"type": "string", "enum": ["records", "table"], "description": "'table' returns columns once plus rows"}
+                },
+                "required": []
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_talk_by_time",
+            "description": "Find a specific event/talk happening at a given time",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "time": {"type": "string", "description": "The time to search for (e.g., '10:00', '14:30')"}
+                },
+                "required": ["time"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_event_details",
+            "description": "Get talks together with their speaker's bio and their location's description in one call, selected by event id, start time or title words",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "event_id": {"type": "integer", "description": "The event id"},
+                    "time": {"type": "string", "description": "The start time (e.g., '10:00', '2pm')"},
+                    "name": {"type": "string", "description": "Words from the talk title"},
+                    "day": {"type": "string", "description": "Optional day as YYYY-MM-DD"}
+                },
+                "required": []
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_talks_at",
+            "description": "List talks starting at a given time one page at a time, optionally only on one day",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "time": {"type": "string", "description": "The start time (e.g., '10:00', '2pm')"},
+                    "day": {"type": "string", "description": "Optional day as YYYY-MM-DD"},
+                    "limit": {"type": "integer", "description": "Page size (default 50, max 200)"},
+                    "cursor": {"type": "string", "description": "next_cursor from the previous page"}
+                },
+                "required": ["time"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_talks_between",
+            "description": "List talks running at any point between two times one page at a time, optionally only on one day",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "start": {"type": "string", "description": "Start of the window (e.g., '14:00', '2pm')"},
+                    "end": {"type": "string", "description": "End of the window (e.g., '16:00', '4pm')"},
+                    "day": {"type": "string", "description": "Optional day as YYYY-MM-DD"},
+                    "limit": {"type": "integer", "description": "Page size (default 50, max 200)"},
+                    "cursor": {"type": "string", "description": "next_cursor from the previous page"}
+                },
+                "required": ["start", "end"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_location",
+            "description": "Get information about a specific venue or location",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string", "description": "The name of the location/venue"}
+                },
+                "required": ["name"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_speaker_info",
+            "description": "Get biographical information about a specific speaker",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string", "description": "The name of the speaker"}
+                },
+                "required": ["name"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "search_events",
+            "description": "Search event titles, speakers and locations by keywords, best matches first",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string", "description": "Keywords to search for (e.g., 'AI healthcare')"},
+                    "limit": {"type": "integer", "description": "Maximum number of results (default 10)"}
+                },
+                "required": ["query"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "search_speakers",
+            "description": "Search speaker names and biographies by keywords, best matches first",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string", "description": "Keywords to search for (e.g., 'quantum computing')"},
+                    "limit": {"type": "integer", "description": "Maximum number of results (default 10)"}
+                },
+                "required": ["query"]
+            }
+        }
+    }
+]
+
+def to_openai_tool(tool) -> dict:
+    """Convert an MCP tool description to the OpenAI function-calling format"""
+    return {
+        "type": "function",
+        "function": {
+            "name": tool.name,
+            "description": tool.description,
+            "parameters": tool.inputSchema or {
+                "type": "object",
+                "properties": {},
+                "required": []
+            }
+        }
+    }
+
+def fallback_drift(functions: dict, fallback: list = FALLBACK_TOOLS) -> list:
+    """Describe every way the fallback schema disagrees with the tool function signatures"""
+    problems = []
+    declared = {tool["function"]["name"]: tool["function"]["parameters"] for tool in fallback}
+    
+    for name in sorted(functions.keys() - declared.keys()):
+        problems.append(f"{name}: missing from fallback schema")
+    for name in sorted(declared.keys() - functions.keys()):
+        problems.append(f"{name}: in fallback schema but not a registered tool")
+    
+    for name in sorted(functions.keys() & declared.keys()):
+        params = inspect.signature(functions[name]).parameters
+        properties = set(declared[name].get("properties", {}))
+        required = set(declared[name].get("required", []))
+        actual_required = {p for p, param in params.items() if param.default is inspect.Parameter.empty}
+        if properties != set(params):
+            problems.append(f"{name}: fallback parameters {sorted(properties)} != signature {sorted(params)}")
+        if required != actual_required:
+            problems.append(f"{name}: fallback required {sorted(required)} != signature {sorted(actual_required)}")
+    
+    return problems
+
+class ToolRegistry:
+    """OpenAI tool payload built once from the MCP server and reused by every request.
+
+    The payload is rebuilt only when the set of tools registered on the
+    FastMCP server changes, so the request path does no schema introspection.
+    """
+
+    def __init__(self, get_mcp):
+        # Called on every use, so the MCP server can be created lazily
+        self.get_mcp = get_mcp
+        self.tools = None
+        self.source = None
+        self.drift = []
+        self._fingerprint = None
+
+    def fingerprint(self) -> tuple:
+        """Cheap identity of the registered tool set"""
+        return tuple((tool.name, id(tool)) for tool in self.get_mcp()._tool_manager.list_tools())
+
+    async def refresh(self) -> list:
+        """Rebuild the payload from the MCP server, falling back to FALLBACK_TOOLS"""
+        mcp = self.get_mcp()
+        fingerprint = self.fingerprint()
+        try:
+            tools_response = await mcp.list_tools()
+            # Older MCP releases wrap the list in a ListToolsResult
+            tools = [to_openai_tool(tool) for tool in getattr(tools_response, "tools", tools_response)]
+            self.source = "mcp"
+        except Exception as e:
+            print(f"Error listing MCP tools, using fallback schema: {e}")
+            tools = FALLBACK_TOOLS
+            self.source = "fallback"
+        
+        functions = {tool.name: tool.fn for tool in mcp._tool_manager.list_tools()}
+        self.drift = fallback_drift(functions)
+        for problem in self.drift:
+            print(f"Fallback tool schema drift: {problem}")
+        
+        self.tools = tools
+        self._fingerprint = fingerprint
+        return tools
+
+    async def get(self) -> list:
+        """Return the cached payload, rebuilding it only if the tool set changed"""
+        if self.tools is None or self.fingerprint() != self._fingerprint:
+            return await self.refresh()
+        return self.tools
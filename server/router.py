@@ -0,0 +1,124 @@
+"""Answers simple lookups straight from the tools, without the LLM.
+
+Each pattern must match the whole question and resolve to a known speaker,
+location or time slot; anything else returns None and goes to the model.
+"""
+import re
+from typing import Optional
+
+import snapshot
+from names import name_keys, normalize_name
+from server import MAX_COUNTED
+from timeslots import format_time, parse_time
+
+# Talks listed in a templated answer; the rest are summarized as a count
+MAX_LISTED = 20
+
+TIME = r"(?P<time>\d{1,2}(?:[:.]\d{2})?\s*(?:[ap]\.?m\.?)?|noon|midday)"
+
+TIME_PATTERNS = [
+    re.compile(rf"^(?:what's|what is|whats) (?:happening|on|going on|scheduled) at {TIME}$"),
+    re.compile(rf"^who's (?:speaking|presenting|talking|on) at {TIME}$"),
+    re.compile(rf"^who is (?:speaking|presenting|talking|on) at {TIME}$"),
+    re.compile(rf"^(?:which|what) (?:talks|events|sessions) (?:are )?(?:there )?(?:at|start at|starting at) {TIME}$"),
+]
+
+BETWEEN_PATTERNS = [
+    re.compile(
+        r"^(?:what's|what is|whats) (?:happening|on|going on|scheduled) between "
+        + TIME.replace("time", "start") + " and " + TIME.replace("time", "end") + "$"
+    ),
+]
+
+# (pattern, kinds of entity the captured name may refer to)
+ENTITY_PATTERNS = [
+    (re.compile(r"^(?:who's|who is|whos) (?P<name>.+)$"), ("speaker",)),
+    (re.compile(r"^(?:where's|where is|wheres) (?:the )?(?P<name>.+)$"), ("location",)),
+    (re.compile(r"^(?:tell me (?:more )?about|describe|what do you know about|info(?:rmation)? (?:on|about)) (?:the )?(?P<name>.+)$"),
+     ("speaker", "location")),
+    (re.compile(r"^(?:what's|what is|whats) (?:the )?(?P<name>.+)$"), ("location",)),
+]
+
+def clean_question(question: str) -> str:
+    question = question.lower().replace("’", "'").strip()
+    return " ".join(question.rstrip("?!. ").split())
+
+class IntentRouter:
+    def __init__(self, functions: dict):
+        self.functions = functions
+        self.version = None
+        self.names = {}
+
+    def _load_names(self, snap):
+        """Index speaker and location names of the current snapshot"""
+        if snap.version == self.version:
+            return
+        names = {}
+        ambiguous = set()
+        for kind, entries in (("speaker", snap.speakers), ("location", snap.locations)):
+            for name in entries:
+                for key in name_keys(name):
+                    if key in names and names[key] != (kind, name):
+                        ambiguous.add(key)
+                    names[key] = (kind, name)
+        for key in ambiguous:
+            del names[key]
+        self.names = names
+        self.version = snap.version
+
+    async def route(self, question: str) -> Optional[str]:
+        """Answer from a template if the question is an unambiguous lookup, else None"""
+        snap = await snapshot.store.current()
+        if snap is None:
+            return None
+        self._load_names(snap)
+        q = clean_question(question)
+        
+        for pattern in TIME_PATTERNS:
+            match = pattern.match(q)
+            if match and parse_time(match.group("time")) is not None:
+                minute = parse_time(match.group("time"))
+                result = await self.functions["get_talks_at"](time=format_time(minute), limit=MAX_LISTED)
+                return format_events(result, f"at {format_time(minute)}")
+        
+        for pattern in BETWEEN_PATTERNS:
+            match = pattern.match(q)
+            if match:
+                start, end = parse_time(match.group("start")), parse_time(match.group("end"))
+                if start is None or end is None or start >= end:
+                    return None
+                result = await self.functions["get_talks_between"](
+                    start=format_time(start), end=format_time(end), limit=MAX_LISTED
+                )
+                return format_events(result, f"between {format_time(start)} and {format_time(end)}")
+        
+        for pattern, kinds in ENTITY_PATTERNS:
+            match = pattern.match(q)
+            if not match:
+                continue
+            entity = self.names.get(normalize_name(match.group("name")))
+            if entity is None or entity[0] not in kinds:
+                continue
+            kind, name = entity
+            if kind == "speaker":
+                bio = await self.functions["get_speaker_info"](name=name)
+                return f"{name}: {bio}"
+            description = await self.functions["get_location"](name=name)
+            return f"{name}: {description}"
+        
+        return None
+
+def format_events(result: dict, when: str) -> str:
+    """One line per talk on the page, then a count of the talks it leaves out"""
+    events = result["events"]
+    if not events:
+        return f"There are no talks scheduled {when}."
+    show_day = len({e.get("day") for e in events}) > 1
+    lines = [f"Talks {when}:"]
+    for e in events:
+        day = f"{e['day']} " if show_day and e.get("day") else ""
+        lines.append(f"- {day}{e['time']} {e['name']}, by {e['speaker_name']} in {e['location_name']}")
+    if result.get("next_cursor"):
+        more = result["more"]
+        lines.append(f"…and {more} more." if more < MAX_COUNTED else f"…and over {MAX_COUNTED} more.")
+    return "\n".join(lines)
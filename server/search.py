@@ -0,0 +1,82 @@
+"""Full-text search over events and speakers.
+
+Postgres uses generated ``tsvector`` columns with GIN indexes; SQLite uses
+FTS5 tables kept in sync with triggers. Both rank matches for any query term.
+"""
+import re
+
+from sqlalchemy import text
+
+# Largest number of results a search tool returns
+MAX_RESULTS = 25
+
+POSTGRES_DDL = [
+    """ALTER TABLE events ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(speaker_name, '') || ' ' || coalesce(location_name, '')), 'B')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_events_search_vector ON events USING GIN (search_vector)",
+    """ALTER TABLE speakers ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(bio, '')), 'B')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_speakers_search_vector ON speakers USING GIN (search_vector)",
+]
+
+# table -> indexed columns, for the SQLite FTS5 mirrors
+SQLITE_FTS_TABLES = {
+    "events": ["name", "speaker_name", "location_name"],
+    "speakers": ["name", "bio"],
+}
+
+def sqlite_ddl(table: str, columns: list) -> list:
+    cols = ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    return [
+        f"CREATE VIRTUAL TABLE {table}_fts USING fts5({cols}, content='{table}', content_rowid='id', tokenize='porter unicode61')",
+        f"CREATE TRIGGER {table}_fts_insert AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {table}_fts(rowid, {cols}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER {table}_fts_delete AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {table}_fts({table}_fts, rowid, {cols}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER {table}_fts_update AFTER UPDATE ON {table} BEGIN "
+        f"INSERT INTO {table}_fts({table}_fts, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {table}_fts(rowid, {cols}) VALUES (new.id, {new}); END",
+        f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')",
+    ]
+
+def create_indexes(conn):
+    """Create the text indexes for the connection's dialect (idempotent)"""
+    if conn.dialect.name == "postgresql":
+        for statement in POSTGRES_DDL:
+            conn.execute(text(statement))
+    elif conn.dialect.name == "sqlite":
+        existing = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))}
+        for table, columns in SQLITE_FTS_TABLES.items():
+            if f"{table}_fts" not in existing:
+                for statement in sqlite_ddl(table, columns):
+                    conn.execute(text(statement))
+
+def query_terms(query: str) -> list:
+    return re.findall(r"\w+", query.lower())
+
+async def search_ids(session, table: str, query: str, limit: int) -> list:
+    """Ids of rows in `table` matching any term of `query`, best match first"""
+    terms = query_terms(query)
+    if not terms:
+        return []
+    limit = max(1, min(limit, MAX_RESULTS))
+    
+    if session.bind.dialect.name == "postgresql":
+        statement = text(
+            f"SELECT id FROM {table}, to_tsquery('english', :terms) AS query "
+            f"WHERE search_vector @@ query ORDER BY ts_rank(search_vector, query) DESC, id LIMIT :limit"
+        )
+        params = {"terms": " | ".join(terms), "limit": limit}
+    else:
+        statement = text(
+            f"SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH :terms ORDER BY rank, rowid LIMIT :limit"
+        )
+        params = {"terms": " OR ".join(f'"{term}"' for term in terms), "limit": limit}
+    
+    return [row[0] for row in await session.execute(statement, params)]
@@ -1,15 +1,26 @@
-from db import Session, init_db
-from models import Event, Location, Speaker
-import random
+"""Seed the database with a realistic, reproducible conference.
 
-init_db()
+The default dataset matches the hand-written lists below (25 locations,
+50 speakers, one talk per title). `scale` or explicit counts grow it for load
+tests; extra rows reuse the realistic names with a suffix. The same `rng_seed`
+always produces the same schedule.
 
-session = Session()
+    python seed.py --scale 1000 --days 3 --seed 7
+"""
+import argparse
+import csv
+import io
+import random
+import time
+from datetime import date, timedelta
+from itertools import islice
 
-# Clear existing data
-session.query(Event).delete()
-session.query(Location).delete()
-session.query(Speaker).delete()
+from sqlalchemy import delete, insert, select
+
+from db import engine, init_db, bump_data_version
+from models import Event, Location, Speaker
+from names import name_keys
+from timeslots import DEFAULT_DURATION, format_time
 
 # Realistic location names and descriptions
 location_data = [
@@ -202,37 +213,157 @@ event_titles = [
     "Autonomous Defense: AI in Military Applications"
 ]
 
-# Create realistic locations
-locations = []
-for name, description in location_data:
-    loc = Location(name=name, description=description)
-    locations.append(loc)
-session.add_all(locations)
-
-# Create realistic speakers
-speakers = []
-for name, bio in speaker_data:
-    sp = Speaker(name=name, bio=bio)
-    speakers.append(sp)
-session.add_all(speakers)
-
-session.commit()
-
-# Create realistic events with varied time slots
-events = []
-time_slots = ["9:00", "9:30", "10:00", "10:30", "11:00", "11:30", "12:00", "12:30", 
-              "13:00", "13:30", "14:00", "14:30", "15:00", "15:30", "16:00", "16:30", "17:00"]
-
-# Create events using realistic titles
-for i, title in enumerate(event_titles):
-    ev = Event(
-        name=title,
-        time=random.choice(time_slots),
-        location_name=random.choice(locations).name,
-        speaker_name=random.choice(speakers).name,
+TIME_SLOTS = list(range(9 * 60, 17 * 60 + 1, 30))
+
+# Rows per INSERT/COPY round-trip
+DEFAULT_BATCH_SIZE = 5000
+
+# `scale` grows locations only up to this multiple (1,000 rooms); larger
+# datasets put more talks in each room rather than adding rooms
+MAX_LOCATION_SCALE = 40
+
+# First conference day unless one is given, fixed so a seed always yields the same dates
+DEFAULT_START_DAY = date(2025, 6, 2)
+
+def numbered(base: list, count: int):
+    """Yield `count` items from `base`, suffixing repeats with a round number"""
+    for i in range(count):
+        item, round_ = base[i % len(base)], i // len(base)
+        yield item if round_ == 0 else (f"{item[0]} {round_ + 1}",) + tuple(item[1:])
+
+def speaker_rows(count: int):
+    """The realistic speakers, then unique first/last name combinations of them.
+
+    A combination that equals a realistic speaker once titles are dropped
+    ("Sarah Chen" for "Dr. Sarah Chen") is skipped in every round, so each
+    name still resolves to one speaker.
+    """
+    realistic = {name_keys(n)[-1] for n, _ in speaker_data}
+    keys = set()
+    for name, bio in islice(speaker_data, count):
+        keys.add(name_keys(name)[-1])
+        yield name, bio
+    firsts = [n.replace("Dr. ", "").split()[0] for n, _ in speaker_data]
+    lasts = [n.split()[-1] for n, _ in speaker_data]
+    i = 0
+    while len(keys) < count:
+        first, last = firsts[i % len(firsts)], lasts[(i // len(firsts) + i) % len(lasts)]
+        bio = speaker_data[i % len(speaker_data)][1]
+        round_ = i // (len(firsts) * len(lasts))
+        name = f"{first} {last}" if round_ == 0 else f"{first} {last} {round_ + 1}"
+        key = name_keys(name)[-1]
+        if key not in keys and name_keys(f"{first} {last}")[-1] not in realistic:
+            keys.add(key)
+            yield name, bio
+        i += 1
+
+def batches(rows, size: int):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+def copy_rows(conn, table, rows: list):
+    """Bulk load with Postgres COPY through the psycopg2 connection"""
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["\\N" if row[c] is None else row[c] for c in columns])
+    buffer.seek(0)
+    cursor = conn.connection.dbapi_connection.cursor()
+    cursor.copy_expert(
+        f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer
     )
-    events.append(ev)
 
-session.add_all(events)
-session.commit()
-session.close()
+def insert_rows(conn, table, rows, batch_size: int) -> int:
+    use_copy = conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg2"
+    count = 0
+    for batch in batches(rows, batch_size):
+        if use_copy:
+            copy_rows(conn, table, batch)
+        else:
+            conn.execute(insert(table), batch)
+        count += len(batch)
+    return count
+
+def seed(scale: float = 1.0, rng_seed: int = 42, days: int = 1, start_day: date = None,
+         events: int = None, speakers: int = None, locations: int = None,
+         batch_size: int = DEFAULT_BATCH_SIZE, bind=engine) -> dict:
+    """Replace all events, speakers and locations with a generated conference.
+
+    Counts default to the realistic dataset times `scale`, except that
+    locations stop growing at MAX_LOCATION_SCALE times. Returns the number
+    of rows written per table and the elapsed seconds.
+    """
+    started = time.perf_counter()
+    rng = random.Random(rng_seed)
+    start_day = start_day or DEFAULT_START_DAY
+    event_count = events if events is not None else round(len(event_titles) * scale)
+    speaker_count = speakers if speakers is not None else max(1, round(len(speaker_data) * scale))
+    location_count = locations if locations is not None else max(1, round(len(location_data) * min(scale, MAX_LOCATION_SCALE)))
+    
+    location_names = [name for name, _ in numbered(location_data, location_count)]
+    speaker_list = list(speaker_rows(speaker_count))
+    speaker_names = [name for name, _ in speaker_list]
+    conference_days = [start_day + timedelta(days=d) for d in range(days)]
+    ids = {}
+    
+    def event_rows():
+        for (title,) in numbered([(t,) for t in event_titles], event_count):
+            start = rng.choice(TIME_SLOTS)
+            location_name = rng.choice(location_names)
+            speaker_name = rng.choice(speaker_names)
+            yield {
+                "name": title,
+                "time": format_time(start),
+                "day": rng.choice(conference_days),
+                "start_minute": start,
+                "end_minute": start + DEFAULT_DURATION,
+                "location_name": location_name,
+                "speaker_name": speaker_name,
+                "location_id": ids["locations"][location_name],
+                "speaker_id": ids["speakers"][speaker_name],
+            }
+    
+    with bind.begin() as conn:
+        # Clear existing data
+        for model in (Event, Location, Speaker):
+            conn.execute(delete(model))
+        
+        counts = {
+            "locations": insert_rows(conn, Location.__table__, (
+                {"name": name, "description": description}
+                for name, description in numbered(location_data, location_count)
+            ), batch_size),
+            "speakers": insert_rows(conn, Speaker.__table__, (
+                {"name": name, "bio": bio} for name, bio in speaker_list
+            ), batch_size),
+        }
+        ids["locations"] = dict(conn.execute(select(Location.name, Location.id)).all())
+        ids["speakers"] = dict(conn.execute(select(Speaker.name, Speaker.id)).all())
+        counts["events"] = insert_rows(conn, Event.__table__, event_rows(), batch_size)
+        bump_data_version(conn)
+    
+    counts["seconds"] = round(time.perf_counter() - started, 3)
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed the event database")
+    parser.add_argument("--scale", type=float, default=1.0, help=f"multiplier for the default dataset size (locations stop at {MAX_LOCATION_SCALE}x)")
+    parser.add_argument("--seed", type=int, default=42, help="random seed; equal seeds give equal data")
+    parser.add_argument("--days", type=int, default=1, help="number of conference days")
+    parser.add_argument("--start-day", type=date.fromisoformat, default=None, help=f"first day, YYYY-MM-DD (default {DEFAULT_START_DAY})")
+    parser.add_argument("--events", type=int, help="exact number of events (overrides --scale)")
+    parser.add_argument("--speakers", type=int, help="exact number of speakers (overrides --scale)")
+    parser.add_argument("--locations", type=int, help="exact number of locations (overrides --scale)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+    
+    init_db()
+    print(seed(
+        scale=args.scale, rng_seed=args.seed, days=args.days, start_day=args.start_day,
+        events=args.events, speakers=args.speakers, locations=args.locations, batch_size=args.batch_size
+    ))
+
+if __name__ == "__main__":
+    main()
@@ -1,49 +1,415 @@
-from mcp.server.fastmcp import FastMCP
-from db import Session, init_db
+from bisect import bisect_right
+from itertools import islice
+from sqlalchemy import func, select
+from db import AsyncSession
 from models import Event, Location, Speaker
+import names
+import search
+import snapshot
+from timeslots import parse_day, parse_time
 
-init_db()
-mcp = FastMCP("EventServer")
-
-@mcp.tool()
-def get_schedule() -> list:
-    """Get the complete event schedule with all talks, times, locations, and speakers"""
-    with Session() as session:
-        events = session.query(Event).all()
-        return [{
-            'id': e.id,
-            'name': e.name,
-            'time': e.time,
-            'location_name': e.location_name,
-            'speaker_name': e.speaker_name
-        } for e in events]
-
-@mcp.tool()
-def get_talk_by_time(time: str) -> dict:
+# Functions exposed as MCP tools, in registration order
+TOOLS = []
+_mcp = None
+
+def tool(fn):
+    """Register `fn` as an MCP tool; the FastMCP server itself is built on first use"""
+    TOOLS.append(fn)
+    return fn
+
+def get_mcp():
+    """The FastMCP server with every tool registered.
+
+    Importing the MCP SDK is a large part of process start-up, so it happens
+    here rather than at import time.
+    """
+    global _mcp
+    if _mcp is None:
+        from mcp.server.fastmcp import FastMCP
+        _mcp = FastMCP("EventServer")
+        for fn in TOOLS:
+            _mcp.add_tool(fn)
+    return _mcp
+
+def require_time(value: str) -> int:
+    minute = parse_time(value)
+    if minute is None:
+        raise ValueError(f"Unrecognized time '{value}', use e.g. '10:00', '14:30' or '2pm'")
+    return minute
+
+def event_to_dict(e) -> dict:
+    return {
+        'id': e.id,
+        'name': e.name,
+        'time': e.time,
+        'day': e.day.isoformat() if e.day else None,
+        'location_name': e.location_name,
+        'speaker_name': e.speaker_name
+    }
+
+# Page size limits for paged tools and endpoints
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Matches past a page are counted up to this many, so a truncated page can
+# say roughly how much it leaves out without counting the whole table
+MAX_COUNTED = 1000
+
+SCHEDULE_FIELDS = ['id', 'name', 'time', 'day', 'location_name', 'speaker_name']
+
+def parse_fields(fields: str) -> list:
+    if not fields:
+        return SCHEDULE_FIELDS
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in selected if f not in SCHEDULE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields {unknown}, choose from {SCHEDULE_FIELDS}")
+    return selected
+
+def encode_schedule(events: list, fields: list, format: str, next_cursor, more: int = 0) -> dict:
+    """Project event dicts to `fields`, as records or as a column header plus rows"""
+    if format == "table":
+        return {
+            'columns': fields,
+            'rows': [[e[f] for f in fields] for e in events],
+            'next_cursor': next_cursor,
+            'more': more
+        }
+    if format != "records":
+        raise ValueError(f"Unknown format '{format}', use 'records' or 'table'")
+    return {
+        'events': [{f: e[f] for f in fields} for e in events],
+        'next_cursor': next_cursor,
+        'more': more
+    }
+
+def truncation_note(shown: int, more: int) -> str:
+    """Tells the model a page is not the whole answer, so it does not present it as one"""
+    count = str(more) if more < MAX_COUNTED else f"over {MAX_COUNTED}"
+    return (f"Only {shown} events are listed here, {count} more match. Tell the user the list is incomplete "
+            "and how many more there are, or pass next_cursor as cursor to get the next page.")
+
+async def count_more(session, query, skip: int) -> int:
+    """Rows of `query` past the first `skip`, counted up to MAX_COUNTED"""
+    rest = query.with_only_columns(Event.id).offset(skip).limit(MAX_COUNTED).subquery()
+    return (await session.execute(select(func.count()).select_from(rest))).scalar_one()
+
+async def query_schedule(location: str = "", speaker: str = "", start: str = "", end: str = "", day: str = "",
+                         limit: int = DEFAULT_PAGE_SIZE, cursor: str = ""):
+    """One page of events matching the filters, in id order, plus the cursor of the next page and
+    how many more events match (up to MAX_COUNTED)"""
+    start_minute = require_time(start) if start else None
+    end_minute = require_time(end) if end else None
+    on_day = parse_day(day)
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    after_id = int(cursor) if cursor else 0
+    more = 0
+    
+    snap = await snapshot.store.current()
+    if snap:
+        # Only the page is turned into records; the rest is just counted
+        rows = snap.filter_rows(location, speaker, start_minute, end_minute, on_day, after_id)
+        page = [snap.event(row).to_dict() for row in islice(rows, limit + 1)]
+        if len(page) > limit:
+            more = 1 + sum(1 for _ in islice(rows, MAX_COUNTED - 1))
+    else:
+        async with AsyncSession() as session:
+            query = select(Event).where(Event.id > after_id)
+            if location:
+                query = query.where(Event.location_name == location)
+            if speaker:
+                query = query.where(Event.speaker_name == speaker)
+            if on_day:
+                query = query.where(Event.day == on_day)
+            if start_minute is not None:
+                query = query.where(Event.end_minute > start_minute)
+            if end_minute is not None:
+                query = query.where(Event.start_minute < end_minute)
+            events = (await session.execute(query.order_by(Event.id).limit(limit + 1))).scalars().all()
+            page = [event_to_dict(e) for e in events]
+            if len(page) > limit:
+                more = await count_more(session, query, limit)
+    
+    next_cursor = str(page[limit - 1]['id']) if len(page) > limit else None
+    return page[:limit], next_cursor, more
+
+async def has_events() -> bool:
+    """Whether the events table has any row, without loading the schedule"""
+    async with AsyncSession() as session:
+        return (await session.execute(select(Event.id).limit(1))).first() is not None
+
+# The descriptive column listed with each location or speaker
+DIRECTORY_FIELDS = {Location: 'description', Speaker: 'bio'}
+
+async def query_directory(model, name: str = "", limit: int = DEFAULT_PAGE_SIZE, cursor: str = ""):
+    """One page of locations or speakers whose name contains `name`, in id order, plus the next cursor"""
+    field = DIRECTORY_FIELDS[model]
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    after_id = int(cursor) if cursor else 0
+    
+    snap = await snapshot.store.current()
+    if snap:
+        records = snap.location_list if model is Location else snap.speaker_list
+        position = bisect_right(records, after_id, key=lambda r: r.id)
+        needle = name.lower()
+        matches = (r for r in records[position:] if needle in r.name.lower())
+        page = [{'id': r.id, 'name': r.name, field: getattr(r, field)} for r in islice(matches, limit + 1)]
+    else:
+        async with AsyncSession() as session:
+            query = select(model).where(model.id > after_id)
+            if name:
+                query = query.where(model.name.ilike(f"%{name}%"))
+            rows = (await session.execute(query.order_by(model.id).limit(limit + 1))).scalars().all()
+            page = [{'id': r.id, 'name': r.name, field: getattr(r, field)} for r in rows]
+    
+    next_cursor = str(page[limit - 1]['id']) if len(page) > limit else None
+    return page[:limit], next_cursor
+
+@tool
+async def get_schedule(location: str = "", speaker: str = "", start: str = "", end: str = "", day: str = "",
+                       fields: str = "", limit: int = DEFAULT_PAGE_SIZE, cursor: str = "",
+                       format: str = "records") -> dict:
+    """Get the event schedule (talks, times, locations, speakers), one page at a time.
+
+    Optional filters: exact location name, exact speaker name, a time window
+    (start/end such as '14:00' and '16:00') and a day (YYYY-MM-DD). `fields` is a
+    comma-separated subset of id,name,time,day,location_name,speaker_name.
+    Pass the returned next_cursor as `cursor` for the next page; `more` says how
+    many further events match. format='table' returns column names once plus
+    rows, which is more compact.
+    """
+    selected = parse_fields(fields)
+    events, next_cursor, more = await query_schedule(location, speaker, start, end, day, limit, cursor)
+    result = encode_schedule(events, selected, format, next_cursor, more)
+    if next_cursor:
+        result['note'] = truncation_note(len(events), more)
+    return result
+
+@tool
+async def get_talk_by_time(time: str) -> dict:
     """Find a specific event/talk happening at a given time (e.g., '10:00', '14:30')"""
-    with Session() as session:
-        event = session.query(Event).filter_by(time=time).first()
+    minute = parse_time(time)
+    if minute is None:
+        return {"error": "Not found"}
+    
+    snap = await snapshot.store.current()
+    if snap:
+        events = snap.at(minute)
+        return events[0].to_dict() if events else {"error": "Not found"}
+    
+    async with AsyncSession() as session:
+        event = (await session.execute(
+            select(Event).filter_by(start_minute=minute).order_by(Event.id).limit(1)
+        )).scalars().first()
         if event:
-            return {
-                'id': event.id,
-                'name': event.name,
-                'time': event.time,
-                'location_name': event.location_name,
-                'speaker_name': event.speaker_name
-            }
+            return event_to_dict(event)
         else:
             return {"error": "Not found"}
 
-@mcp.tool()
-def get_location(name: str) -> str:
+# Cap on get_event_details matches, each one carries a bio and a description
+MAX_DETAILS = 10
+
+def event_details(event: dict, location, speaker) -> dict:
+    return {
+        **event,
+        'location': {'name': location.name, 'description': location.description} if location else None,
+        'speaker': {'name': speaker.name, 'bio': speaker.bio} if speaker else None
+    }
+
+async def query_event_details(event_id: int, minute, name: str, on_day) -> list:
+    snap = await snapshot.store.current()
+    if snap:
+        if event_id:
+            candidates = [snap.by_id[event_id]] if event_id in snap.by_id else []
+        elif minute is not None:
+            candidates = snap.at(minute, on_day)
+        else:
+            candidates = snap.events
+        needle = name.lower()
+        matches = islice((
+            e for e in candidates
+            if (not needle or needle in e.name.lower())
+            and (on_day is None or e.day == on_day)
+            and (minute is None or e.start_minute == minute)
+        ), MAX_DETAILS)
+        return [event_details(e.to_dict(), snap.locations.get(e.location_name), snap.speakers.get(e.speaker_name))
+                for e in matches]
+    
+    async with AsyncSession() as session:
+        query = (
+            select(Event, Location, Speaker)
+            .outerjoin(Location, Event.location_id == Location.id)
+            .outerjoin(Speaker, Event.speaker_id == Speaker.id)
+        )
+        if event_id:
+            query = query.where(Event.id == event_id)
+        if minute is not None:
+            query = query.where(Event.start_minute == minute)
+        if name:
+            query = query.where(Event.name.ilike(f"%{name}%"))
+        if on_day:
+            query = query.where(Event.day == on_day)
+        rows = (await session.execute(query.order_by(Event.day, Event.id).limit(MAX_DETAILS))).all()
+        return [event_details(event_to_dict(e), loc, speaker) for e, loc, speaker in rows]
+
+@tool
+async def get_event_details(event_id: int = 0, time: str = "", name: str = "", day: str = "") -> list:
+    """Get talks together with their speaker's bio and their location's description in one call.
+
+    Select by event id, by start time (e.g. '10:00'), or by words in the title;
+    optionally only on one day (YYYY-MM-DD).
+    """
+    minute = require_time(time) if time else None
+    on_day = parse_day(day)
+    if not (event_id or minute is not None or name):
+        raise ValueError("Pass an event_id, a time or a name")
+    
+    details = await query_event_details(event_id, minute, name, on_day)
+    if not details and name:
+        # A misspelled title gets one more try with its closest match
+        resolved = names.titles.best(name)
+        if resolved and resolved != name:
+            details = await query_event_details(event_id, minute, resolved, on_day)
+    return details
+
+def talks_page(page: list, limit: int, next_cursor, more: int) -> dict:
+    result = {'events': page[:limit], 'next_cursor': next_cursor, 'more': max(more, 0)}
+    if next_cursor:
+        result['note'] = truncation_note(limit, result['more'])
+    return result
+
+@tool
+async def get_talks_at(time: str, day: str = "", limit: int = DEFAULT_PAGE_SIZE, cursor: str = "") -> dict:
+    """List talks starting at a given time (e.g., '10:00', '2pm'), optionally only on one day (YYYY-MM-DD).
+
+    Returns one page at a time; pass the returned next_cursor as `cursor` for the next page.
+    """
+    minute = require_time(time)
+    on_day = parse_day(day)
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    after_id = int(cursor) if cursor else 0
+    
+    snap = await snapshot.store.current()
+    if snap:
+        events = snap.at(minute, on_day)
+        position = bisect_right(events, after_id, key=lambda e: e.id)
+        page = [e.to_dict() for e in events[position:position + limit + 1]]
+        more = min(len(events) - position - limit, MAX_COUNTED)
+    else:
+        async with AsyncSession() as session:
+            query = select(Event).where(Event.start_minute == minute, Event.id > after_id)
+            if on_day:
+                query = query.where(Event.day == on_day)
+            events = (await session.execute(query.order_by(Event.id).limit(limit + 1))).scalars().all()
+            page = [event_to_dict(e) for e in events]
+            more = await count_more(session, query, limit) if len(page) > limit else 0
+    
+    next_cursor = str(page[limit - 1]['id']) if len(page) > limit else None
+    return talks_page(page, limit, next_cursor, more)
+
+@tool
+async def get_talks_between(start: str, end: str, day: str = "", limit: int = DEFAULT_PAGE_SIZE,
+                            cursor: str = "") -> dict:
+    """List talks running at any point between two times (e.g., '14:00' and '16:00'), optionally only on one day (YYYY-MM-DD).
+
+    Returns one page at a time, ordered by day and start time; pass the
+    returned next_cursor as `cursor` for the next page.
+    """
+    start_minute, end_minute = require_time(start), require_time(end)
+    on_day = parse_day(day)
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    offset = int(cursor) if cursor else 0
+    
+    snap = await snapshot.store.current()
+    if snap:
+        events = snap.between(start_minute, end_minute, on_day)
+        page = [e.to_dict() for e in events[offset:offset + limit + 1]]
+        more = min(len(events) - offset - limit, MAX_COUNTED)
+    else:
+        async with AsyncSession() as session:
+            query = select(Event).where(Event.start_minute < end_minute, Event.end_minute > start_minute)
+            if on_day:
+                query = query.where(Event.day == on_day)
+            query = query.order_by(Event.day, Event.start_minute, Event.id)
+            page = [event_to_dict(e) for e in (await session.execute(query.offset(offset).limit(limit + 1))).scalars().all()]
+            more = await count_more(session, query, offset + limit) if len(page) > limit else 0
+    
+    # Pages are in time rather than id order, so the cursor is a position
+    next_cursor = str(offset + limit) if len(page) > limit else None
+    return talks_page(page, limit, next_cursor, more)
+
+@tool
+async def get_location(name: str) -> str:
     """Get information about a specific venue or location by name"""
-    with Session() as session:
-        loc = session.query(Location).filter_by(name=name).first()
-        return loc.description if loc else "Unknown location"
+    snap = await snapshot.store.current()
+    if snap:
+        loc = snap.locations.get(name)
+        if loc:
+            return loc.description
+        resolved = names.locations.best(name)
+        if resolved in snap.locations:
+            return f"{resolved}: {snap.locations[resolved].description}"
+        return names.suggestion("location", names.locations, name)
+    
+    async with AsyncSession() as session:
+        loc = (await session.execute(select(Location).filter_by(name=name))).scalars().first()
+        if loc:
+            return loc.description
+        resolved = names.locations.best(name)
+        if resolved:
+            loc = (await session.execute(select(Location).filter_by(name=resolved))).scalars().first()
+            if loc:
+                return f"{loc.name}: {loc.description}"
+        return names.suggestion("location", names.locations, name)
 
-@mcp.tool()
-def get_speaker_info(name: str) -> str:
+@tool
+async def get_speaker_info(name: str) -> str:
     """Get biographical information about a specific speaker by name"""
-    with Session() as session:
-        speaker = session.query(Speaker).filter_by(name=name).first()
-        return speaker.bio if speaker else "Unknown speaker"
+    snap = await snapshot.store.current()
+    if snap:
+        speaker = snap.speakers.get(name)
+        if speaker:
+            return speaker.bio
+        resolved = names.speakers.best(name)
+        if resolved in snap.speakers:
+            return f"{resolved}: {snap.speakers[resolved].bio}"
+        return names.suggestion("speaker", names.speakers, name)
+    
+    async with AsyncSession() as session:
+        speaker = (await session.execute(select(Speaker).filter_by(name=name))).scalars().first()
+        if speaker:
+            return speaker.bio
+        resolved = names.speakers.best(name)
+        if resolved:
+            speaker = (await session.execute(select(Speaker).filter_by(name=resolved))).scalars().first()
+            if speaker:
+                return f"{speaker.name}: {speaker.bio}"
+        return names.suggestion("speaker", names.speakers, name)
+
+@tool
+async def search_events(query: str, limit: int = 10) -> list:
+    """Search event titles, speakers and locations by keywords (e.g., 'AI healthcare'), best matches first"""
+    async with AsyncSession() as session:
+        ids = await search.search_ids(session, "events", query, limit)
+        snap = await snapshot.store.current()
+        if snap:
+            return [snap.by_id[i].to_dict() for i in ids if i in snap.by_id]
+        events = {e.id: e for e in (await session.execute(select(Event).where(Event.id.in_(ids)))).scalars()}
+        return [event_to_dict(events[i]) for i in ids if i in events]
+
+@tool
+async def search_speakers(query: str, limit: int = 10) -> list:
+    """Search speaker names and biographies by keywords (e.g., 'quantum computing'), best matches first"""
+    async with AsyncSession() as session:
+        ids = await search.search_ids(session, "speakers", query, limit)
+        snap = await snapshot.store.current()
+        if snap:
+            speakers = snap.speakers_by_id
+        else:
+            speakers = {s.id: s for s in (await session.execute(select(Speaker).where(Speaker.id.in_(ids)))).scalars()}
+        return [{'name': speakers[i].name, 'bio': speakers[i].bio} for i in ids if i in speakers]
+
+if __name__ == "__main__":
+    from db import init_db
+    init_db()
+    get_mcp().run()
@@ -0,0 +1,178 @@
+"""Server-side conversation history for follow-up questions.
+
+Each conversation keeps its recent turns (question, tool calls and results,
+answer) plus short summaries of the speakers, locations and events its tool
+results mentioned. `context()` compacts that into messages that fit a token
+budget: only the newest turns keep their raw tool output, older turns keep
+question and answer, and whatever falls off is represented by the summaries.
+"""
+import json
+import os
+import secrets
+import time
+from collections import OrderedDict
+from typing import Optional
+
+# Summaries kept per conversation, and events summarized per tool result
+MAX_ENTITIES = 40
+MAX_EVENTS_PER_RESULT = 10
+SUMMARY_CHARS = 200
+
+def estimate_tokens(message: dict) -> int:
+    """Rough token count (about four characters per token, plus framing)"""
+    return len(json.dumps(message, separators=(",", ":"))) // 4 + 4
+
+def as_dict(message) -> dict:
+    return message if isinstance(message, dict) else message.model_dump(exclude_none=True)
+
+def event_summary(event: dict) -> Optional[tuple]:
+    if not isinstance(event, dict) or "name" not in event:
+        return None
+    details = [f"'{event['name']}'"]
+    if event.get("time"):
+        details.append(f"at {event['time']}" + (f" on {event['day']}" if event.get("day") else ""))
+    if event.get("location_name"):
+        details.append(f"in {event['location_name']}")
+    if event.get("speaker_name"):
+        details.append(f"by {event['speaker_name']}")
+    return ("event", event.get("id", event["name"])), "Event " + " ".join(details)
+
+def summarize_result(name: str, arguments: dict, content: str) -> list:
+    """(key, summary) pairs for the entities one tool result resolved"""
+    if name == "get_speaker_info" and not content.startswith("Unknown"):
+        return [(("speaker", arguments.get("name")), f"Speaker {arguments.get('name')}: {content[:SUMMARY_CHARS]}")]
+    if name == "get_location" and not content.startswith("Unknown"):
+        return [(("location", arguments.get("name")), f"Location {arguments.get('name')}: {content[:SUMMARY_CHARS]}")]
+    
+    try:
+        result = json.loads(content)
+    except ValueError:
+        return []
+    if isinstance(result, dict):
+        result = result.get("events", [result])
+    if not isinstance(result, list):
+        return []
+    
+    summaries = []
+    for item in result[:MAX_EVENTS_PER_RESULT]:
+        if isinstance(item, dict) and "bio" in item:
+            summaries.append((("speaker", item["name"]), f"Speaker {item['name']}: {item['bio'][:SUMMARY_CHARS]}"))
+        elif (summary := event_summary(item)) is not None:
+            summaries.append(summary)
+            # get_event_details nests the speaker and location records
+            if isinstance(speaker := item.get("speaker"), dict):
+                summaries.append((("speaker", speaker["name"]), f"Speaker {speaker['name']}: {(speaker['bio'] or '')[:SUMMARY_CHARS]}"))
+            if isinstance(location := item.get("location"), dict):
+                summaries.append((("location", location["name"]), f"Location {location['name']}: {(location['description'] or '')[:SUMMARY_CHARS]}"))
+    return summaries
+
+class Conversation:
+    def __init__(self, id: str):
+        self.id = id
+        self.turns = []
+        self.entities = OrderedDict()
+        self.updated_at = time.monotonic()
+
+    def record(self, question: str, tool_messages: list, answer: str, max_turns: int):
+        """Add a finished turn and remember the entities its tool results resolved"""
+        tool_messages = [as_dict(m) for m in tool_messages]
+        calls = {}
+        for message in tool_messages:
+            for call in message.get("tool_calls") or []:
+                try:
+                    arguments = json.loads(call["function"]["arguments"] or "{}")
+                except ValueError:
+                    arguments = {}
+                calls[call["id"]] = (call["function"]["name"], arguments)
+        for message in tool_messages:
+            if message.get("role") == "tool" and message.get("tool_call_id") in calls:
+                name, arguments = calls[message["tool_call_id"]]
+                for key, summary in summarize_result(name, arguments, message.get("content") or ""):
+                    self.entities[key] = summary
+                    self.entities.move_to_end(key)
+        while len(self.entities) > MAX_ENTITIES:
+            self.entities.popitem(last=False)
+        
+        self.turns.append((question, tool_messages, answer))
+        del self.turns[:-max_turns]
+        self.updated_at = time.monotonic()
+
+    def context(self, budget: int, raw_turns: int = 1) -> list:
+        """History messages to send before the next question, within `budget` tokens"""
+        used = 0
+        notes = None
+        if self.entities:
+            notes = {
+                "role": "system",
+                "content": "Facts already looked up in this conversation:\n" + "\n".join(self.entities.values())
+            }
+            used = estimate_tokens(notes)
+            if used > budget // 2:
+                # Keep the newest summaries within half the budget
+                lines = []
+                for summary in reversed(self.entities.values()):
+                    if estimate_tokens({"content": "\n".join(lines + [summary])}) > budget // 2:
+                        break
+                    lines.append(summary)
+                notes["content"] = "Facts already looked up in this conversation:\n" + "\n".join(reversed(lines))
+                used = estimate_tokens(notes)
+        
+        selected = []
+        for age, (question, tool_messages, answer) in enumerate(reversed(self.turns)):
+            brief = [{"role": "user", "content": question}, {"role": "assistant", "content": answer}]
+            full = brief[:1] + tool_messages + brief[1:]
+            for messages in ((full, brief) if age < raw_turns and tool_messages else (brief,)):
+                cost = sum(estimate_tokens(m) for m in messages)
+                if used + cost <= budget:
+                    selected.append(messages)
+                    used += cost
+                    break
+            else:
+                break
+        
+        history = [m for messages in reversed(selected) for m in messages]
+        return ([notes] if notes else []) + history
+
+class ConversationStore:
+    """Bounded in-process conversations, evicted least-recently-used and after `ttl` idle seconds"""
+
+    def __init__(self, max_conversations: int, ttl: float):
+        self.max_conversations = max_conversations
+        self.ttl = ttl
+        self.conversations = OrderedDict()
+
+    def expire(self):
+        """Drop conversations idle for longer than `ttl`"""
+        now = time.monotonic()
+        while self.conversations:
+            oldest = next(iter(self.conversations.values()))
+            if now - oldest.updated_at < self.ttl:
+                break
+            del self.conversations[oldest.id]
+
+    def start(self) -> Conversation:
+        """A new conversation under an unguessable id issued by the server"""
+        self.expire()
+        session_id = secrets.token_urlsafe(16)
+        conversation = self.conversations[session_id] = Conversation(session_id)
+        while len(self.conversations) > self.max_conversations:
+            self.conversations.popitem(last=False)
+        return conversation
+
+    def get(self, session_id: str) -> Optional[Conversation]:
+        """The conversation issued as `session_id`, or None if it is unknown or has expired"""
+        self.expire()
+        conversation = self.conversations.get(session_id)
+        if conversation is not None:
+            conversation.updated_at = time.monotonic()
+            self.conversations.move_to_end(session_id)
+        return conversation
+
+conversations = ConversationStore(
+    max_conversations=int(os.getenv("SESSION_MAX", "10000")),
+    ttl=float(os.getenv("SESSION_TTL", "1800"))
+)
+
+# Token budget for history sent with each question, and turns kept per conversation
+SESSION_TOKEN_BUDGET = int(os.getenv("SESSION_TOKEN_BUDGET", "2000"))
+SESSION_MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", "20"))
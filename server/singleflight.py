@@ -0,0 +1,37 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable
+
+class SingleFlight:
+    """Share one in-flight computation between concurrent callers with the same key.
+
+    The first caller starts the computation; later callers with the same key
+    await the same task and get the same result or exception. The key is
+    forgotten as soon as the task finishes, so this never serves stale results.
+    A caller that is cancelled does not cancel the shared task.
+    """
+
+    def __init__(self):
+        self.calls = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def _forget(self, key, task):
+        if self.calls.get(key) is task:
+            del self.calls[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every waiter went away
+            task.exception()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]):
+        task = self.calls.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self.calls[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.followers += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self.calls), "leaders": self.leaders, "followers": self.followers}
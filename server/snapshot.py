@@ -0,0 +1,217 @@
+import asyncio
+from bisect import bisect_left, bisect_right
+import os
+import time
+from collections import defaultdict
+from typing import Optional
+
+from sqlalchemy import select
+
+from db import AsyncSession, get_data_version
+from models import Event, Location, Speaker
+import names
+
+# Seconds between data-version checks; a snapshot is trusted in between
+REFRESH_INTERVAL = float(os.getenv("SNAPSHOT_REFRESH_SECONDS", "5"))
+# File holding a snapshot shared by all worker processes (see snapshotfile.py);
+# unset, each process keeps its own in memory
+SHARED_PATH = os.getenv("SNAPSHOT_PATH", "")
+
+class EventRecord:
+    __slots__ = ("id", "name", "time", "location_name", "speaker_name", "day", "start_minute", "end_minute")
+
+    def __init__(self, id, name, time, location_name, speaker_name, day, start_minute, end_minute):
+        self.id = id
+        self.name = name
+        self.time = time
+        self.location_name = location_name
+        self.speaker_name = speaker_name
+        self.day = day
+        self.start_minute = start_minute
+        self.end_minute = end_minute
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'name': self.name,
+            'time': self.time,
+            'day': self.day.isoformat() if self.day else None,
+            'location_name': self.location_name,
+            'speaker_name': self.speaker_name
+        }
+
+class LocationRecord:
+    __slots__ = ("id", "name", "description")
+
+    def __init__(self, id, name, description):
+        self.id = id
+        self.name = name
+        self.description = description
+
+class SpeakerRecord:
+    __slots__ = ("id", "name", "bio")
+
+    def __init__(self, id, name, bio):
+        self.id = id
+        self.name = name
+        self.bio = bio
+
+def sort_key(event):
+    return (event.day is not None, event.day, event.start_minute, event.id)
+
+class Snapshot:
+    """Read-only copy of the schedule tables with hash indexes for the tools"""
+
+    def __init__(self, version: int, events: list, locations: list, speakers: list):
+        self.version = version
+        self.events = events
+        self.by_id = {event.id: event for event in events}
+        self.locations = {loc.name: loc for loc in locations}
+        self.speakers = {speaker.name: speaker for speaker in speakers}
+        self.speakers_by_id = {speaker.id: speaker for speaker in speakers}
+        # Id-ordered lists for paging through the directory
+        self.location_list = sorted(locations, key=lambda loc: loc.id)
+        self.speaker_list = sorted(speakers, key=lambda speaker: speaker.id)
+        self.by_start = defaultdict(list)
+        self.by_location = defaultdict(list)
+        self.by_speaker = defaultdict(list)
+        for event in events:
+            self.by_start[event.start_minute].append(event)
+            self.by_location[event.location_name].append(event)
+            self.by_speaker[event.speaker_name].append(event)
+        
+        # Events sorted by start time, for bisecting time ranges
+        self.timeline = sorted((e for e in events if e.start_minute is not None), key=lambda e: e.start_minute)
+        self.timeline_starts = [e.start_minute for e in self.timeline]
+        self.max_duration = max((e.end_minute - e.start_minute for e in self.timeline), default=0)
+
+    def at(self, minute: int, day=None) -> list:
+        """Events starting at the given minute"""
+        return [e for e in self.by_start.get(minute, ()) if day is None or e.day == day]
+
+    def between(self, start: int, end: int, day=None) -> list:
+        """Events running at any point in [start, end), ordered by day and start time"""
+        lo = bisect_left(self.timeline_starts, start - self.max_duration)
+        hi = bisect_left(self.timeline_starts, end)
+        events = [e for e in self.timeline[lo:hi] if e.end_minute > start and (day is None or e.day == day)]
+        events.sort(key=sort_key)
+        return events
+
+    def titles(self) -> set:
+        """Distinct event titles"""
+        return {e.name for e in self.events if e.name}
+
+    def event(self, row) -> EventRecord:
+        """The record for a row yielded by filter_rows; here rows are the records themselves"""
+        return row
+
+    def filter_rows(self, location=None, speaker=None, start=None, end=None, day=None, after_id=0):
+        """Rows of the events matching every given filter, in id order, with id > after_id.
+
+        Pass a row to `event` for its record; matches can be counted without
+        building records.
+        """
+        if location:
+            candidates = self.by_location.get(location, [])
+        elif speaker:
+            candidates = self.by_speaker.get(speaker, [])
+        elif start is not None and end is not None:
+            candidates = sorted(self.between(start, end, day), key=lambda e: e.id)
+        else:
+            candidates = self.events
+        
+        # Candidate lists are all in id order, so the cursor is a bisect
+        position = bisect_right(candidates, after_id, key=lambda e: e.id)
+        for event in candidates[position:]:
+            if location and event.location_name != location:
+                continue
+            if speaker and event.speaker_name != speaker:
+                continue
+            if day is not None and event.day != day:
+                continue
+            if start is not None and (event.end_minute is None or event.end_minute <= start):
+                continue
+            if end is not None and (event.start_minute is None or event.start_minute >= end):
+                continue
+            yield event
+
+    @classmethod
+    async def load(cls) -> "Snapshot":
+        # Read the version first: if data changes mid-load the next check reloads
+        version = await get_data_version()
+        async with AsyncSession() as session:
+            events = await session.execute(
+                select(
+                    Event.id, Event.name, Event.time, Event.location_name, Event.speaker_name,
+                    Event.day, Event.start_minute, Event.end_minute
+                ).order_by(Event.id)
+            )
+            locations = await session.execute(select(Location.id, Location.name, Location.description))
+            speakers = await session.execute(select(Speaker.id, Speaker.name, Speaker.bio))
+            return cls(
+                version,
+                [EventRecord(*row) for row in events],
+                [LocationRecord(*row) for row in locations],
+                [SpeakerRecord(*row) for row in speakers],
+            )
+
+class SnapshotStore:
+    """Holds the current Snapshot and swaps it when the data version moves"""
+
+    def __init__(self):
+        self.snapshot = None
+        self.stale = True
+        self.checked_at = 0.0
+        self._refresh_task = None
+
+    async def load(self) -> Snapshot:
+        """Build a new snapshot from the database, or map the shared one, and make it current"""
+        if SHARED_PATH:
+            import snapshotfile
+            snapshot = await snapshotfile.load(SHARED_PATH)
+        else:
+            snapshot = await Snapshot.load()
+        await names.sync(snapshot)
+        self.snapshot = snapshot
+        self.stale = False
+        self.checked_at = time.monotonic()
+        return snapshot
+
+    def _schedule_refresh(self):
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh())
+
+    async def _refresh(self):
+        try:
+            await self.load()
+        except Exception as e:
+            print(f"Error refreshing schedule snapshot: {e}")
+
+    async def current(self) -> Optional[Snapshot]:
+        """Return the snapshot if it is known to be current, otherwise None.
+
+        A stale or missing snapshot is rebuilt in the background while
+        callers fall back to SQL.
+        """
+        if self.snapshot is None or self.stale:
+            self._schedule_refresh()
+            return None
+        
+        now = time.monotonic()
+        if now - self.checked_at < REFRESH_INTERVAL:
+            return self.snapshot
+        
+        self.checked_at = now
+        if await get_data_version() == self.snapshot.version:
+            return self.snapshot
+        
+        self.stale = True
+        self._schedule_refresh()
+        return None
+
+    async def data_version(self) -> int:
+        """Version of the data behind the tools, from the snapshot when it is current"""
+        snap = await self.current()
+        return snap.version if snap else await get_data_version()
+
+store = SnapshotStore()
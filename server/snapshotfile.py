@@ -0,0 +1,333 @@
+"""Schedule snapshot stored in a memory-mapped file shared by worker processes.
+
+With several workers, one of them loads the schedule from the database and
+writes it here as flat integer arrays plus a string table; every worker maps
+the same file, so the read model is built once per data version and its
+pages are shared by all processes. Records are decoded on access.
+
+A new version is written to a temporary file and renamed over the old one,
+so readers see either the old or the new snapshot, never a partial one.
+Workers that still hold the old mapping keep using it until they reload.
+"""
+import asyncio
+import fcntl
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping, Sequence
+from datetime import date
+from functools import lru_cache
+
+from db import get_data_version
+from snapshot import EventRecord, LocationRecord, Snapshot, SpeakerRecord
+
+MAGIC = b"EVSNAP01"
+# magic, data version, max event duration, number of sections
+HEADER = struct.Struct("<8sqiI")
+# section name, array typecode, item count
+SECTION = struct.Struct("<32scQ")
+ALIGN = 8
+STRING_CACHE_SIZE = 4096
+
+EVENT_COLUMNS = ("id", "name", "time", "location_name", "speaker_name", "day", "start_minute", "end_minute")
+STRING_COLUMNS = {"name", "time", "location_name", "speaker_name", "description", "bio"}
+
+class StringTable:
+    def __init__(self):
+        self.ids = {}
+        self.blob = bytearray()
+        self.offsets = array("q", [0])
+
+    def add(self, value) -> int:
+        if value is None:
+            return -1
+        if value not in self.ids:
+            self.ids[value] = len(self.offsets) - 1
+            self.blob += value.encode()
+            self.offsets.append(len(self.blob))
+        return self.ids[value]
+
+def encode_column(strings: StringTable, records, column: str) -> array:
+    values = (getattr(r, column) for r in records)
+    if column in STRING_COLUMNS:
+        return array("i", (strings.add(v) for v in values))
+    if column == "day":
+        return array("i", (v.toordinal() if v else 0 for v in values))
+    return array("i", (-1 if v is None else v for v in values))
+
+def sections(snap: Snapshot) -> list:
+    """(name, array) pairs holding every record and index of `snap`"""
+    strings = StringTable()
+    events = snap.events
+    row = {event.id: i for i, event in enumerate(events)}
+    locations = sorted(snap.locations.values(), key=lambda r: r.id)
+    speakers = sorted(snap.speakers.values(), key=lambda r: r.id)
+
+    result = [(f"event.{c}", encode_column(strings, events, c)) for c in EVENT_COLUMNS]
+    result += [
+        ("timeline", array("i", (row[e.id] for e in snap.timeline))),
+        ("timeline_starts", array("i", snap.timeline_starts)),
+        # Event rows grouped by location and by speaker name, each group in id order
+        ("by_location", array("i", (row[e.id] for e in sorted(
+            (e for e in events if e.location_name is not None), key=lambda e: (e.location_name, e.id))))),
+        ("by_speaker", array("i", (row[e.id] for e in sorted(
+            (e for e in events if e.speaker_name is not None), key=lambda e: (e.speaker_name, e.id))))),
+    ]
+    for kind, records, detail in (("location", locations, "description"), ("speaker", speakers, "bio")):
+        result += [(f"{kind}.{c}", encode_column(strings, records, c)) for c in ("id", "name", detail)]
+        result.append((f"{kind}.by_name", array("i", sorted(range(len(records)), key=lambda i: records[i].name))))
+    result += [("strings", strings.offsets), ("blob", array("B", strings.blob))]
+    return result
+
+def write(path: str, snap: Snapshot):
+    """Write `snap` to `path`, replacing any previous snapshot atomically"""
+    parts = sections(snap)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, snap.version, snap.max_duration, len(parts)))
+        for name, values in parts:
+            f.write(SECTION.pack(name.encode(), values.typecode.encode(), len(values)))
+        for _, values in parts:
+            f.write(b"\0" * (-f.tell() % ALIGN))
+            values.tofile(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+class SnapshotFile:
+    """Typed views over the sections of a mapped snapshot file"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.version, self.max_duration, count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a schedule snapshot")
+
+        headers = [SECTION.unpack_from(self.map, HEADER.size + i * SECTION.size) for i in range(count)]
+        offset = HEADER.size + count * SECTION.size
+        view = memoryview(self.map)
+        self.sections = {}
+        self.positions = {}
+        for name, typecode, length in headers:
+            name = name.rstrip(b"\0").decode()
+            offset += -offset % ALIGN
+            size = array(typecode.decode()).itemsize * length
+            self.sections[name] = view[offset:offset + size].cast(typecode.decode())
+            self.positions[name] = offset
+            offset += size
+
+        self.events = [self.sections[f"event.{c}"] for c in EVENT_COLUMNS]
+        self.offsets = self.sections["strings"]
+        self.blob_start = self.positions["blob"]
+        # Times, rooms and speaker names repeat across events, so a small
+        # per-process cache of decoded strings saves most of the decoding
+        self.cached_string = lru_cache(maxsize=STRING_CACHE_SIZE)(self.string)
+
+    def string(self, i: int):
+        if i < 0:
+            return None
+        return self.map[self.blob_start + self.offsets[i]:self.blob_start + self.offsets[i + 1]].decode()
+
+    def event(self, row: int) -> EventRecord:
+        ids, names, times, locations, speakers, days, starts, ends = self.events
+        day, start, end = days[row], starts[row], ends[row]
+        cached = self.cached_string
+        return EventRecord(
+            ids[row], self.string(names[row]), cached(times[row]), cached(locations[row]), cached(speakers[row]),
+            date.fromordinal(day) if day else None, None if start < 0 else start, None if end < 0 else end,
+        )
+
+    def record(self, kind: str, row: int):
+        cls, detail = (LocationRecord, "description") if kind == "location" else (SpeakerRecord, "bio")
+        s = self.sections
+        return cls(s[f"{kind}.id"][row], self.string(s[f"{kind}.name"][row]), self.string(s[f"{kind}.{detail}"][row]))
+
+class RecordView(Sequence):
+    """Records decoded on access from a list of rows"""
+
+    def __init__(self, decode, rows):
+        self.decode = decode
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return RecordView(self.decode, self.rows[i])
+        return self.decode(self.rows[i])
+
+    def __iter__(self):
+        return map(self.decode, self.rows)
+
+class KeyIndex(Mapping):
+    """Mapping over rows sorted by key, looked up by bisection.
+
+    With `group` set a key maps to a view of all its rows, otherwise to the
+    one record with that key.
+    """
+
+    def __init__(self, rows, key, decode, group: bool = False):
+        self.rows = rows
+        self.key = key
+        self.decode = decode
+        self.group = group
+
+    def rows_for(self, key):
+        """The rows with `key`, undecoded"""
+        try:
+            lo = bisect_left(self.rows, key, key=self.key)
+            hi = bisect_right(self.rows, key, lo=lo, key=self.key)
+        except TypeError:
+            return self.rows[0:0]
+        return self.rows[lo:hi]
+
+    def __getitem__(self, key):
+        rows = self.rows_for(key)
+        if not len(rows):
+            raise KeyError(key)
+        if self.group:
+            return RecordView(self.decode, rows)
+        return self.decode(rows[0])
+
+    def __iter__(self):
+        previous = object()
+        for row in self.rows:
+            key = self.key(row)
+            if key != previous:
+                yield key
+                previous = key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+class SharedSnapshot(Snapshot):
+    """Snapshot backed by a SnapshotFile, with the same attributes and queries.
+
+    The time and filter queries select rows on the integer columns and
+    return views that decode a record only when it is read, so a page of
+    results costs the same however many events match.
+    """
+
+    def __init__(self, file: SnapshotFile):
+        s = file.sections
+        self.file = file
+        self.version = file.version
+        self.max_duration = file.max_duration
+
+        rows = range(len(s["event.id"]))
+        self.events = RecordView(file.event, rows)
+        self.by_id = KeyIndex(rows, s["event.id"].__getitem__, file.event)
+        self.timeline = RecordView(file.event, s["timeline"])
+        self.timeline_starts = s["timeline_starts"]
+        self.by_start = KeyIndex(s["timeline"], s["event.start_minute"].__getitem__, file.event, group=True)
+        self.by_location = KeyIndex(s["by_location"], lambda r: file.string(s["event.location_name"][r]),
+                                    file.event, group=True)
+        self.by_speaker = KeyIndex(s["by_speaker"], lambda r: file.string(s["event.speaker_name"][r]),
+                                   file.event, group=True)
+
+        def directory(kind):
+            decode = lambda row: file.record(kind, row)
+            ids = range(len(s[f"{kind}.id"]))
+            return (
+                RecordView(decode, ids),
+                KeyIndex(ids, s[f"{kind}.id"].__getitem__, decode),
+                KeyIndex(s[f"{kind}.by_name"], lambda r: file.string(s[f"{kind}.name"][r]), decode),
+            )
+        self.location_list, _, self.locations = directory("location")
+        self.speaker_list, self.speakers_by_id, self.speakers = directory("speaker")
+
+    def at(self, minute: int, day=None) -> RecordView:
+        rows = self.by_start.rows_for(minute)
+        if day is not None:
+            days, ordinal = self.file.sections["event.day"], day.toordinal()
+            rows = [r for r in rows if days[r] == ordinal]
+        return RecordView(self.file.event, rows)
+
+    def between(self, start: int, end: int, day=None) -> RecordView:
+        s = self.file.sections
+        ends, days = s["event.end_minute"], s["event.day"]
+        ordinal = day.toordinal() if day is not None else None
+        lo = bisect_left(self.timeline_starts, start - self.max_duration)
+        hi = bisect_left(self.timeline_starts, end)
+        rows = [r for r in s["timeline"][lo:hi] if ends[r] > start and (ordinal is None or days[r] == ordinal)]
+        # The timeline is in (start, id) order, so a stable sort on the day
+        # gives the (day, start, id) order of Snapshot.between; no day (0) sorts first
+        rows.sort(key=days.__getitem__)
+        return RecordView(self.file.event, rows)
+
+    def titles(self) -> set:
+        # Strings are interned in the file, so each distinct title is decoded once
+        return {self.file.string(i) for i in set(self.file.sections["event.name"]) if i >= 0}
+
+    def event(self, row: int) -> EventRecord:
+        return self.file.event(row)
+
+    def filter_rows(self, location=None, speaker=None, start=None, end=None, day=None, after_id=0):
+        ids, _, _, _, speakers, days, starts, ends = self.file.events
+        if location:
+            candidates = self.by_location.rows_for(location)
+        elif speaker:
+            candidates = self.by_speaker.rows_for(speaker)
+        elif start is not None and end is not None:
+            candidates = sorted(self.between(start, end, day).rows)
+        else:
+            candidates = range(len(ids))
+        
+        # Rows are in id order, so the cursor is a bisect on the id column
+        candidates = candidates[bisect_left(candidates, bisect_right(ids, after_id)):]
+        speaker_string = None
+        if location and speaker:
+            speaker_rows = self.by_speaker.rows_for(speaker)
+            if not len(speaker_rows):
+                return
+            speaker_string = speakers[speaker_rows[0]]
+        ordinal = day.toordinal() if day is not None else None
+        
+        for row in candidates:
+            if speaker_string is not None and speakers[row] != speaker_string:
+                continue
+            if ordinal is not None and days[row] != ordinal:
+                continue
+            if start is not None and ends[row] <= start:
+                continue
+            if end is not None and not 0 <= starts[row] < end:
+                continue
+            yield row
+
+def open_snapshot(path: str, version: int):
+    """The shared snapshot at `path` if it holds `version` or newer, else None"""
+    try:
+        file = SnapshotFile(path)
+    except (FileNotFoundError, ValueError):
+        return None
+    return SharedSnapshot(file) if file.version >= version else None
+
+def lock(path: str) -> int:
+    fd = os.open(f"{path}.lock", os.O_CREAT | os.O_RDWR, 0o644)
+    fcntl.flock(fd, fcntl.LOCK_EX)
+    return fd
+
+def unlock(fd: int):
+    fcntl.flock(fd, fcntl.LOCK_UN)
+    os.close(fd)
+
+async def load(path: str) -> SharedSnapshot:
+    """Map the current shared snapshot, building it first if no worker has yet"""
+    version = await get_data_version()
+    if (snap := open_snapshot(path, version)) is not None:
+        return snap
+
+    # One worker builds each version; the others wait here and then map it
+    fd = await asyncio.to_thread(lock, path)
+    try:
+        if (snap := open_snapshot(path, version)) is not None:
+            return snap
+        built = await Snapshot.load()
+        await asyncio.to_thread(write, path, built)
+        return open_snapshot(path, built.version)
+    finally:
+        unlock(fd)
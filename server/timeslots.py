@@ -0,0 +1,39 @@
+import re
+from datetime import date
+from typing import Optional
+
+# Length given to events that only have a start time
+DEFAULT_DURATION = 30
+
+TIME_PATTERN = re.compile(r"^\s*(\d{1,2})(?:[:.h](\d{2}))?\s*([ap])?\.?\s*m?\.?\s*$", re.IGNORECASE)
+
+NAMED_TIMES = {"noon": 12 * 60, "midday": 12 * 60, "midnight": 0}
+
+def parse_time(value: str) -> Optional[int]:
+    """Convert '9:00', '14:30', '2pm' or '2:30 PM' to minutes after midnight"""
+    if value is None:
+        return None
+    value = str(value).strip().lower()
+    if value in NAMED_TIMES:
+        return NAMED_TIMES[value]
+    match = TIME_PATTERN.match(value)
+    if not match:
+        return None
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem == "p" else 0)
+    if hour > 23 or minute > 59:
+        return None
+    return hour * 60 + minute
+
+def format_time(minutes: int) -> str:
+    """Inverse of parse_time, in the 24-hour 'H:MM' form used by the schedule"""
+    return f"{minutes // 60}:{minutes % 60:02d}"
+
+def parse_day(value: Optional[str]) -> Optional[date]:
+    """Parse an ISO 'YYYY-MM-DD' day, treating empty values as 'any day'"""
+    if not value:
+        return None
+    return date.fromisoformat(str(value).strip())